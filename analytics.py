@@ -0,0 +1,237 @@
+"""
+This module computes the analytics cube the report is drawn from: lecture series and catalogue courses counted by
+department, year and semester, with every roll-up of these dimensions (marked `ALL`), e.g. per department over all
+years or per year over all departments.
+
+The counts are read from the summary tables storage.py maintains and from `matches`, and all cells are aggregated in
+a single grouped pass. The cube is cached on disk under the version of the data it was computed from, so figures and
+ad hoc queries select from it without touching the raw tables until the data changes.
+
+Measures of a cell:
+    total_count, accessible_count       lecture series on the portal, and how many of them are publicly accessible
+    catalogue_count                     courses in the catalogue (only known for department ALL)
+    recorded_courses, accessible_courses
+                                        catalogue courses matched to a (publicly accessible) series, see matching.py
+    accessible_fraction                 accessible_count / total_count
+    uploaded_fraction, public_fraction  total_count and accessible_count / catalogue_count
+    recorded_fraction, accessible_course_fraction
+                                        recorded_courses and accessible_courses / catalogue_count
+
+Usage:
+    python analytics.py [--by department year semester] [--until 2024] [--db lecture_data.db]
+"""
+
+import os
+import glob
+import hashlib
+import argparse
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from storage import connect, DB_PATH
+
+CACHE_DIR = ".analytics_cache"
+
+DIMENSIONS = ("department", "year", "semester")
+
+# key of the cells aggregating over a dimension
+ALL = "*"
+
+# the grouping sets of the cube: every subset of the dimensions
+GROUPINGS = [set(grouping) for size in range(len(DIMENSIONS) + 1) for grouping in combinations(DIMENSIONS, size)]
+
+# ratio -> (numerator, denominator)
+RATIOS = {
+    "accessible_fraction": ("accessible_count", "total_count"),
+    "uploaded_fraction": ("total_count", "catalogue_count"),
+    "public_fraction": ("accessible_count", "catalogue_count"),
+    "recorded_fraction": ("recorded_courses", "catalogue_count"),
+    "accessible_course_fraction": ("accessible_courses", "catalogue_count"),
+}
+
+# state of the tables the cube is computed from; each query is answered from indexes or small tables
+VERSION_QUERIES = [
+    "SELECT COUNT(*), MAX(valid_from), MAX(valid_to) FROM lecture_history",
+    "SELECT year, semester, total_count FROM catalogue_summary ORDER BY year, semester",
+    "SELECT version FROM table_versions WHERE name = 'matches'",
+]
+
+
+def data_version(conn):
+    """
+    Identifies the state of the data the cube is computed from. Every write to `lectures` adds or closes a version
+    in `lecture_history`, so its size and latest timestamps change with any lecture, and every write to `matches`
+    bumps its counter in `table_versions`.
+
+    Args:
+        conn (sqlite3.Connection): An open connection, see `storage.connect`.
+
+    Returns:
+        str: The version, a hash.
+    """
+    digest = hashlib.sha256()
+    for query in VERSION_QUERIES:
+        digest.update(repr(conn.execute(query).fetchall()).encode())
+    return digest.hexdigest()[:16]
+
+
+def _load(conn):
+    """
+    Reads the rows the cube is computed from, keyed by the dimensions; semesters use the catalogue's codes.
+
+    Lecture series and catalogue courses are read pre-aggregated from `lecture_summary` and `catalogue_summary`,
+    whose counts add up over any roll-up. Recorded courses have to be counted distinctly (a course recorded by series
+    of two departments counts once for both), so matches are read row by row, joined with the department and access of
+    their series.
+    """
+    portal = pd.read_sql(
+        "SELECT department, year, semester, total_count, accessible_count FROM lecture_summary", conn)
+    catalogue = pd.read_sql("SELECT year, semester, total_count AS catalogue_count FROM catalogue_summary", conn)
+    # a match counts for the semester of its course and the department of its series; matches of series no longer
+    # stored are dropped
+    matches = pd.read_sql('''
+        SELECT matches.number, matches.year, matches.semester, lectures.department, lectures.access
+        FROM matches JOIN lectures ON lectures.url = matches.url
+    ''', conn)
+    for frame in (portal, catalogue, matches):
+        keys = [dimension for dimension in DIMENSIONS if dimension in frame.columns]
+        frame[keys] = frame[keys].fillna("").astype(str)
+
+    catalogue = catalogue.assign(department=ALL)
+    # one id per catalogue course, shared by the matches recording it
+    course = pd.MultiIndex.from_frame(matches[["number", "year", "semester"]]).factorize()[0]
+    recorded = matches[list(DIMENSIONS)].assign(
+        recorded_course=course, accessible_course=pd.Series(course).where(matches["access"] == 1))
+    return portal, catalogue, recorded
+
+
+def compute_cube(conn):
+    """
+    Computes the cube from the database.
+
+    Every row is repeated once per grouping set, with the dimensions it is aggregated over set to `ALL`, and all
+    cells are then aggregated by one groupby over the stacked rows: the counts of the summaries are summed, and
+    recorded courses are counted distinctly. Catalogue courses have no department and only
+    enter the grouping sets aggregating over departments.
+
+    Args:
+        conn (sqlite3.Connection): An open connection, see `storage.connect`.
+
+    Returns:
+        pandas.DataFrame: The measures indexed by (department, year, semester).
+    """
+    portal, catalogue, recorded = _load(conn)
+    stacked = []
+    for grouping in GROUPINGS:
+        rolled = {dimension: ALL for dimension in DIMENSIONS if dimension not in grouping}
+        stacked.append(portal.assign(**rolled))
+        stacked.append(recorded.assign(**rolled))
+        if "department" not in grouping:
+            stacked.append(catalogue.assign(**rolled))
+    stacked = pd.concat(stacked, ignore_index=True)
+
+    cube = stacked.groupby(list(DIMENSIONS)).agg(
+        total_count=("total_count", "sum"),
+        accessible_count=("accessible_count", "sum"),
+        catalogue_count=("catalogue_count", "sum"),
+        recorded_courses=("recorded_course", "nunique"),
+        accessible_courses=("accessible_course", "nunique"),
+    )
+    counts = list(cube.columns)
+    cube[counts] = cube[counts].astype(float)
+    cube.loc[cube.index.get_level_values("department") != ALL, "catalogue_count"] = np.nan
+    return add_ratios(cube)
+
+
+def load_cube(db_path=DB_PATH, cache_dir=CACHE_DIR, refresh=False):
+    """
+    Returns the cube of the current data, from the on-disk cache if it was computed for the same data version.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        cache_dir (str): Directory of the cached cube; None disables the cache.
+        refresh (bool): Whether to recompute the cube even if it is cached.
+
+    Returns:
+        pandas.DataFrame: The cube, see `compute_cube`.
+    """
+    conn = connect(db_path)
+    try:
+        if cache_dir is None:
+            return compute_cube(conn)
+        version = data_version(conn)
+        path = os.path.join(cache_dir, f"cube-{version}.pkl")
+        if not refresh and os.path.exists(path):
+            return pd.read_pickle(path)
+        cube = compute_cube(conn)
+    finally:
+        conn.close()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(cache_dir, "cube-*.pkl")):
+        os.remove(stale)
+    cube.to_pickle(path)
+    return cube
+
+
+def add_ratios(frame):
+    """Computes the ratios of `RATIOS` from the counts of a frame, in place; returns the frame."""
+    for ratio, (numerator, denominator) in RATIOS.items():
+        frame[ratio] = frame[numerator] / frame[denominator].replace(0, np.nan)
+    return frame
+
+
+def view(cube, by, until=None):
+    """
+    Selects the cells of the cube broken down by some dimensions and aggregated over the others.
+
+    Courses are counted per year and semester, so with `until` and `year` not in `by`, the cells of the remaining
+    years are summed.
+
+    Args:
+        cube (pandas.DataFrame): The cube, see `load_cube`.
+        by (iterable): The dimensions to break down by, e.g. ['year'].
+        until (int, optional): Only count years before this one.
+
+    Returns:
+        pandas.DataFrame: One row per combination of the `by` dimensions, with these as columns, sorted by them.
+    """
+    by = list(by)
+    unknown = set(by) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown dimensions {sorted(unknown)}, choose from {list(DIMENSIONS)}")
+    if until is not None and "year" not in by:
+        years = view(cube, by + ["year"], until)
+        counts = [column for column in cube.columns if column not in RATIOS]
+        if not by:
+            return add_ratios(years[counts].sum(min_count=1).to_frame().T)
+        return add_ratios(years.groupby(by, as_index=False)[counts].sum(min_count=1))
+
+    keys = cube.index.to_frame(index=False)
+    mask = np.ones(len(cube), dtype=bool)
+    for dimension in DIMENSIONS:
+        rolled = (keys[dimension] == ALL).to_numpy()
+        mask &= ~rolled if dimension in by else rolled
+    if until is not None:
+        mask &= (keys["year"] < str(until)).to_numpy()
+    selected = cube[mask].reset_index().drop(columns=[d for d in DIMENSIONS if d not in by])
+    return selected.sort_values(by).reset_index(drop=True) if by else selected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a view of the analytics cube.")
+    parser.add_argument("--by", nargs="*", default=["year"], choices=DIMENSIONS, help="dimensions to break down by")
+    parser.add_argument("--until", type=int, help="only show years before this one")
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    parser.add_argument("--refresh", action="store_true", help="recompute the cube even if it is cached")
+    args = parser.parse_args()
+
+    cube = load_cube(args.db, refresh=args.refresh)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(view(cube, args.by, args.until).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
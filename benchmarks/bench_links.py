@@ -0,0 +1,110 @@
+"""
+Micro-benchmark comparing the link extraction backends of `links.py` with the previous BeautifulSoup path
+(a full html.parser tree followed by `find_all("a")`) on the HTML pages of a corpus generated by corpus.py, or on
+saved pages.
+
+Usage:
+    python benchmarks/bench_links.py [--repeat 20]
+    python benchmarks/bench_links.py --save https://video.ethz.ch/lectures/d-phys/2018/autumn.html
+    python benchmarks/bench_links.py --pages benchmarks/pages
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from corpus import generate_corpus  # noqa: E402
+from links import available_backends, extract_hrefs  # noqa: E402
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+
+
+def soup_tree(content):
+    """The previous path: build the full tree and collect all anchors."""
+    return BeautifulSoup(content, "html.parser").find_all("a")
+
+
+def save_pages(urls, pages_dir):
+    """Downloads pages into the benchmark corpus."""
+    from scraper import fetch
+
+    os.makedirs(pages_dir, exist_ok=True)
+    for url in urls:
+        name = url.split("://", 1)[-1].replace("/", "_").replace("?", "_")
+        with open(os.path.join(pages_dir, name), "wb") as f:
+            f.write(fetch(url))
+        print(f"Saved {url}")
+
+
+def load_pages(pages_dir):
+    pages = []
+    for name in sorted(os.listdir(pages_dir)):
+        with open(os.path.join(pages_dir, name), "rb") as f:
+            pages.append(f.read())
+    return pages
+
+
+def generated_pages():
+    """Returns the HTML pages (portal and catalogue, no JSON) of a freshly generated corpus."""
+    with tempfile.TemporaryDirectory() as path:
+        corpus = generate_corpus(path, departments=4, years=range(2019, 2024), catalogue_years=range(2022, 2024))
+        return [corpus.read(url) for url in corpus.urls() if corpus.pages[url]["type"] != "json"]
+
+
+def measure(function, pages, repeat):
+    """Returns the mean time per page in milliseconds and the peak traced memory in KiB for one pass."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            function(page)
+    elapsed = (time.perf_counter() - start) / (repeat * len(pages)) * 1000
+
+    tracemalloc.start()
+    for page in pages:
+        function(page)
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="directory of saved pages (default: a generated corpus)")
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the corpus per backend")
+    parser.add_argument("--save", nargs="+", metavar="URL", help="download pages into the corpus and exit")
+    args = parser.parse_args()
+
+    if args.save:
+        save_pages(args.save, args.pages or PAGES_DIR)
+        return
+
+    if args.pages is None:
+        pages = generated_pages()
+    elif os.path.isdir(args.pages) and os.listdir(args.pages):
+        pages = load_pages(args.pages)
+    else:
+        sys.exit(f"No saved pages in {args.pages}, add some with --save URL")
+    size = sum(len(page) for page in pages) / len(pages) / 1024
+    print(f"{len(pages)} pages, {size:.1f} KiB on average\n")
+
+    candidates = [("bs4 tree (previous)", soup_tree)]
+    candidates += [(backend, lambda page, backend=backend: extract_hrefs(page, backend))
+                   for backend in available_backends()]
+
+    baseline = None
+    print(f"{'path':<22}{'ms/page':>10}{'peak KiB':>12}{'speedup':>10}")
+    for name, function in candidates:
+        elapsed, peak = measure(function, pages, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{name:<22}{elapsed:>10.3f}{peak:>12.1f}{baseline / elapsed:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
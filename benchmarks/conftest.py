@@ -0,0 +1,51 @@
+"""
+Fixtures of the offline benchmark suite: a generated page corpus, a replay server serving it, and a scraper session
+routed to that server with the response cache disabled.
+
+Set BENCH_CORPUS to the directory of a recorded corpus (see corpus.py) to benchmark against real pages, and
+BENCH_LATENCY / BENCH_ERROR_RATE to simulate a slow or flaky origin.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import Corpus, generate_corpus  # noqa: E402
+from replay import ReplayServer, install  # noqa: E402
+import scraper  # noqa: E402
+from ratelimit import Scheduler  # noqa: E402
+from transport import RequestsTransport  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def corpus(tmp_path_factory):
+    if os.environ.get("BENCH_CORPUS"):
+        return Corpus(os.environ["BENCH_CORPUS"])
+    return generate_corpus(str(tmp_path_factory.mktemp("corpus")), departments=4, years=range(2019, 2024))
+
+
+@pytest.fixture(scope="session")
+def replay_server(corpus):
+    server = ReplayServer(corpus,
+                          latency=float(os.environ.get("BENCH_LATENCY", 0.005)),
+                          error_rate=float(os.environ.get("BENCH_ERROR_RATE", 0.0)))
+    with server:
+        yield server
+
+
+@pytest.fixture
+def replay(replay_server, monkeypatch):
+    """Routes the scraper to the replay server and disables the response cache."""
+    transport = RequestsTransport()
+    install(transport, replay_server.url)
+    monkeypatch.setattr(scraper, "TRANSPORT", transport)
+    monkeypatch.setattr(scraper, "CACHE", None)
+    # fresh, permissive limits so earlier benchmarks do not throttle later ones
+    monkeypatch.setattr(scraper, "SCHEDULER", Scheduler(rate=1e6, burst=1e6, concurrency=64, max_concurrency=64))
+    replay_server.requests = 0
+    yield replay_server
+    transport.close()
@@ -0,0 +1,224 @@
+"""
+Page corpora for offline benchmarks of the scraper.
+
+A corpus is a directory of response bodies plus a `manifest.json` mapping each original URL to its file and page type.
+Corpora are either recorded from the live sites (`record_corpus`) or generated with the structure of video.ethz.ch and
+vvz.ethz.ch (`generate_corpus`), so the benchmarks also run without network access.
+"""
+
+import os
+import sys
+import json
+import random
+import hashlib
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scraper  # noqa: E402
+
+MANIFEST = "manifest.json"
+
+ROOT_URL = "https://video.ethz.ch/"
+
+PAGE_TYPES = ["root", "department", "year", "semester", "json", "catalogue"]
+
+
+class Corpus:
+    """
+    A directory of recorded responses.
+
+    Args:
+        path (str): Directory of the corpus.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}  # url -> {"file": ..., "type": ...}
+        manifest = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest):
+            with open(manifest) as f:
+                self.pages = json.load(f)
+
+    def add(self, url, content, page_type):
+        """Stores the body of a URL in the corpus."""
+        os.makedirs(self.path, exist_ok=True)
+        name = hashlib.sha1(url.encode()).hexdigest()
+        with open(os.path.join(self.path, name), "wb") as f:
+            f.write(content)
+        self.pages[url] = {"file": name, "type": page_type}
+
+    def save(self):
+        """Writes the manifest."""
+        with open(os.path.join(self.path, MANIFEST), "w") as f:
+            json.dump(self.pages, f, indent=1, sort_keys=True)
+
+    def read(self, url):
+        """Returns the body stored for a URL, or None if it is not in the corpus."""
+        page = self.pages.get(url)
+        if page is None:
+            return None
+        with open(os.path.join(self.path, page["file"]), "rb") as f:
+            return f.read()
+
+    def urls(self, page_type=None):
+        """Returns the URLs in the corpus, optionally restricted to a page type."""
+        return sorted(url for url, page in self.pages.items() if page_type in (None, page["type"]))
+
+
+def page_type(url):
+    """Classifies a URL of the two sites into one of `PAGE_TYPES`."""
+    if "vvz.ethz.ch" in url:
+        return "catalogue"
+    if url.endswith(".series-metadata.json"):
+        return "json"
+    depth = len(url.split("/lectures/", 1)[-1].split("/")) if "/lectures/" in url else 0
+    return ["root", "department", "year", "semester"][min(depth, 3)]
+
+
+def record_corpus(path, run):
+    """
+    Records every response fetched while `run()` executes into a corpus.
+
+    Args:
+        path (str): Directory of the corpus.
+        run (callable): Scrapes the pages to record, e.g. `lambda: scraper.get_lectures(url)`.
+
+    Returns:
+        Corpus: The recorded corpus.
+    """
+    corpus = Corpus(path)
+    original = scraper.fetch
+
+    def recording_fetch(url):
+        content = original(url)
+        corpus.add(url, content, page_type(url))
+        return content
+
+    scraper.fetch = recording_fetch
+    try:
+        run()
+    finally:
+        scraper.fetch = original
+    corpus.save()
+    return corpus
+
+
+def _html(body):
+    navigation = "".join(f'<li><a href="/{section}.html">{section}</a></li>'
+                         for section in ["news", "events", "about", "help", "login", "search"])
+    return (f'<!DOCTYPE html><html><head><title>Video Portal</title></head><body>'
+            f'<nav><ul>{navigation}</ul></nav><main>{body}</main>'
+            f'<footer><a href="https://ethz.ch/">ETH Zurich</a></footer></body></html>').encode()
+
+
+def _catalogue_page(rng, semkez, page, pages, rows):
+    cells = []
+    for n in range(rows):
+        number = f"{rng.randint(100, 999)}-{rng.randint(0, 9999):04d}-{semkez[2:4]}L"
+        kind = rng.choice(["2V", "2V + 1U", "2G", "3V + 2U", "1U"])
+        cells.append(f"<tr><td><b>{number}</b></td><td><a href=\"lerneinheit.view?id={n}\">Course {semkez} {page} {n}"
+                     f"</a></td><td>Prof. Lecturer {n % 40}</td><td>{rng.randint(1, 10)} KP</td><td>{kind}</td>"
+                     f"<td>D, E</td></tr>")
+    pagination = "".join(f'<a href="sucheLehrangebot.view?semkez={semkez}&amp;seite={p}">{p}</a>'
+                         for p in range(1, pages + 1))
+    return (f"<html><body><div class=\"pagination\">{pagination}</div><table>"
+            f"<tr><th>Nummer</th><th>Titel</th><th>Dozierende</th><th>KP</th><th>Typ</th><th>Sprache</th></tr>"
+            f"{''.join(cells)}</table></body></html>").encode()
+
+
+def generate_corpus(path, departments=16, years=range(2011, 2025), lectures=12, episodes=20,
+                    catalogue_years=range(2006, 2024), catalogue_pages=3, catalogue_rows=200, seed=0):
+    """
+    Generates a corpus with the structure of video.ethz.ch (main site, departments, years, semesters, series
+    metadata) and of the course catalogue (paginated results per semester).
+
+    Args:
+        path (str): Directory of the corpus.
+        departments (int): Number of departments.
+        years (iterable): Years each department has recordings for.
+        lectures (int): Lecture series per semester.
+        episodes (int): Episodes per lecture series.
+        catalogue_years (iterable): Years of the course catalogue.
+        catalogue_pages (int): Additional results pages per catalogue semester.
+        catalogue_rows (int): Rows per catalogue results page.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        Corpus: The generated corpus.
+    """
+    rng = random.Random(seed)
+    corpus = Corpus(path)
+    names = [f"d-dep{n:02d}" for n in range(departments)]
+
+    # pages link their children more than once and in several variants (menu and tile, fragments, query strings),
+    # as the live site does
+    corpus.add(ROOT_URL, _html("".join(f'<a href="/lectures/{d}.html">{d}</a>' for d in names) + "".join(
+        f'<a href="/lectures/{d}.html#content">{d}</a>' for d in names)), "root")
+    for department in names:
+        corpus.add(f"{ROOT_URL}lectures/{department}.html", _html("".join(
+            f'<a href="/lectures/{department}/{year}.html">{year}</a>'
+            f'<a href="/lectures/{department}/{year}.html?lang=en">{year}</a>' for year in years)), "department")
+
+        for year in years:
+            corpus.add(f"{ROOT_URL}lectures/{department}/{year}.html", _html("".join(
+                f'<a href="/lectures/{department}/{year}/{semester}.html">{semester}</a>'
+                for semester in ["spring", "autumn"])), "year")
+
+            for semester in ["spring", "autumn"]:
+                series = [f"/lectures/{department}/{year}/{semester}/{rng.randint(0, 999):03d}-{n:04d}-00L"
+                          for n in range(lectures)]
+                corpus.add(f"{ROOT_URL}lectures/{department}/{year}/{semester}.html", _html("".join(
+                    f'<div class="series"><a href="{link}.html"><img src="{link}.jpg"></a>'
+                    f'<a href="{link}.html#player">Series {link}</a>'
+                    f'<p>Recorded lectures</p></div>' for link in series)), "semester")
+
+                for link in series:
+                    metadata = {
+                        "title": f"Series {link}",
+                        "description": "Lecture recordings " * 20,
+                        "protection": rng.choice(["NONE", "ETH", "PWD"]),
+                        "episodes": [{"id": f"{link}-{e}", "title": f"Episode {e}", "createdBy": ["Lecturer"],
+                                      "duration": rng.randint(1000, 6000)} for e in range(episodes)],
+                        "selectedEpisode": {"createdBy": [f"Lecturer {rng.randint(0, 99)}"]},
+                    }
+                    corpus.add(f"{ROOT_URL.rstrip('/')}{link}.series-metadata.json",
+                               json.dumps(metadata).encode(), "json")
+
+    for year in catalogue_years:
+        for semester in ["W", "S"]:
+            semkez = f"{year}{semester}"
+            for page in range(catalogue_pages + 1):
+                corpus.add(scraper.catalogue_url(semkez, page),
+                           _catalogue_page(rng, semkez, page, catalogue_pages, catalogue_rows), "catalogue")
+
+    corpus.save()
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate or record a page corpus for the benchmarks.")
+    parser.add_argument("path", help="directory of the corpus")
+    parser.add_argument("--record", action="store_true",
+                        help="record a live crawl of one department year and one catalogue semester instead")
+    args = parser.parse_args()
+
+    if args.record:
+        scraper.CACHE = None
+
+        def run():
+            for semester in scraper.get_semester("https://video.ethz.ch/lectures/d-phys/2023.html"):
+                for lecture in scraper.get_lectures(semester):
+                    scraper.get_json(lecture)
+            scraper.get_department_links(ROOT_URL)
+            scraper.get_years("https://video.ethz.ch/lectures/d-phys.html")
+            scraper.get_catalogue_page("2022W", 1, 2022)
+
+        corpus = record_corpus(args.path, run)
+    else:
+        corpus = generate_corpus(args.path)
+    print(f"{len(corpus.pages)} pages in {args.path}")
+
+
+if __name__ == "__main__":
+    main()
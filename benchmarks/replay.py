@@ -0,0 +1,147 @@
+"""
+A local HTTP server replaying a page corpus, with configurable latency and error injection.
+
+`install` mounts an adapter on a `transport.RequestsTransport` that routes requests for video.ethz.ch and
+www.vvz.ethz.ch to the server while leaving the URLs seen by the scraper unchanged.
+
+Usage:
+    python benchmarks/replay.py CORPUS [--port 8000] [--latency 0.05] [--error-rate 0.01]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import Corpus  # noqa: E402
+
+HOSTS = ["video.ethz.ch", "www.vvz.ethz.ch"]
+
+HOST_HEADER = "X-Replay-Host"
+
+
+class ReplayServer:
+    """
+    Serves a corpus over HTTP in a background thread.
+
+    Args:
+        corpus (Corpus): The pages to serve.
+        latency (float): Mean delay in seconds added to every response.
+        jitter (float): Maximum deviation from the mean delay, in seconds.
+        error_rate (float): Fraction of requests answered with 503 Service Unavailable.
+        port (int): Port to listen on, 0 picks a free one.
+        seed (int): Seed of the random generator driving jitter and errors.
+    """
+
+    def __init__(self, corpus, latency=0.0, jitter=0.0, error_rate=0.0, port=0, seed=0):
+        self.corpus = corpus
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    delay = max(0.0, server.latency + server.random.uniform(-server.jitter, server.jitter))
+                    failure = server.random.random() < server.error_rate
+                    if failure:
+                        server.errors += 1
+                time.sleep(delay)
+
+                host = self.headers.get(HOST_HEADER) or HOSTS[0]
+                content = server.corpus.read(f"https://{host}{self.path}")
+                if failure or content is None:
+                    self.send_response(503 if failure else 404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Transport adapter sending requests to a replay server instead of the original host."""
+
+    def __init__(self, server_url, **kwargs):
+        super().__init__(**kwargs)
+        self.server_url = server_url
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.headers[HOST_HEADER] = parts.netloc
+        request.url = self.server_url + parts.path + (f"?{parts.query}" if parts.query else "")
+        return super().send(request, **kwargs)
+
+
+def install(transport, server_url, pool_maxsize=32):
+    """Routes all requests of a transport for the scraped hosts to a replay server."""
+    adapter = ReplayAdapter(server_url, pool_connections=len(HOSTS), pool_maxsize=pool_maxsize)
+    for host in HOSTS:
+        transport.mount(f"https://{host}/", adapter)
+    return adapter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a page corpus over HTTP.")
+    parser.add_argument("corpus", help="directory of the corpus")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean delay per response in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum deviation of the delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server = ReplayServer(Corpus(args.corpus), args.latency, args.jitter, args.error_rate, args.port)
+    print(f"Replaying {len(server.corpus.pages)} pages on {server.url} (set the {HOST_HEADER} header to pick a host)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Offline benchmarks of the scraper: parse time per page type, fetch + parse through the replay server, and end-to-end
+crawl wall time. Throughput is reported as `pages_per_sec` in the extra info of each benchmark.
+
+Usage:
+    python -m pytest benchmarks --benchmark-columns=mean,stddev,rounds --benchmark-json=bench.json
+"""
+
+import pytest
+from bs4 import BeautifulSoup
+
+import scraper
+from crawler import crawl_lecture_links
+from catalogue import iter_catalogue_entries
+from jsonparse import project_series
+from links import extract_hrefs
+
+pytest.importorskip("pytest_benchmark")
+
+SAMPLE = 50  # pages per page type in the parse benchmarks
+
+PORTAL_PARSERS = {
+    "root": scraper.parse_department_links,
+    "department": scraper.parse_years,
+    "year": scraper.parse_semester,
+    "semester": scraper.parse_lectures,
+}
+
+
+def report(benchmark, pages):
+    """Records the throughput of the last benchmark in pages per second."""
+    benchmark.extra_info["pages"] = pages
+    if benchmark.stats:  # None with --benchmark-disable
+        benchmark.extra_info["pages_per_sec"] = pages / benchmark.stats.stats.mean
+
+
+def sample(corpus, page_type):
+    urls = corpus.urls(page_type)[:SAMPLE]
+    if not urls:
+        pytest.skip(f"No {page_type} pages in the corpus")
+    return [(url, corpus.read(url)) for url in urls]
+
+
+@pytest.mark.parametrize("page_type", list(PORTAL_PARSERS))
+def test_parse_portal(benchmark, corpus, page_type):
+    pages = sample(corpus, page_type)
+    parse = PORTAL_PARSERS[page_type]
+    benchmark(lambda: [parse(extract_hrefs(content), url) for url, content in pages])
+    report(benchmark, len(pages))
+
+
+def test_parse_json(benchmark, corpus):
+    pages = sample(corpus, "json")
+    benchmark(lambda: [project_series(content) for _, content in pages])
+    report(benchmark, len(pages))
+
+
+def test_parse_catalogue(benchmark, corpus):
+    pages = sample(corpus, "catalogue")
+    benchmark(lambda: [list(iter_catalogue_entries(content, 2022, "W")) for _, content in pages])
+    report(benchmark, len(pages))
+
+
+def test_parse_catalogue_soup(benchmark, corpus):
+    pages = sample(corpus, "catalogue")[:5]
+    benchmark(lambda: [scraper.extract_catalgogue_data(BeautifulSoup(content, "html.parser"), 2022, "W")
+                       for _, content in pages])
+    report(benchmark, len(pages))
+
+
+FETCHERS = {
+    "root": scraper.get_department_links,
+    "department": scraper.get_years,
+    "year": scraper.get_semester,
+    "semester": scraper.get_lectures,
+    "json": lambda url: scraper.get_json(url.replace(".series-metadata.json", ".html")),
+}
+
+
+@pytest.mark.parametrize("page_type", list(FETCHERS))
+def test_fetch(benchmark, corpus, replay, page_type):
+    url = sample(corpus, page_type)[0][0]
+    fetcher = FETCHERS[page_type]
+    result = benchmark(fetcher, url)
+    assert result
+    report(benchmark, 1)
+
+
+def test_fetch_catalogue(benchmark, corpus, replay):
+    url = sample(corpus, "catalogue")[0][0]
+    semkez = url.split("semkez=")[1][:5]
+    entries, _ = benchmark(scraper.get_catalogue_page, semkez, 0, int(semkez[:4]))
+    assert entries
+    report(benchmark, 1)
+
+
+@pytest.mark.parametrize("parse_processes", [0, 2])
+def test_catalogue(benchmark, corpus, replay, parse_processes):
+    """Retrieves every catalogue semester of the corpus, parsing in the fetching threads or in a process pool."""
+    years = sorted({int(url.split("semkez=")[1][:4]) for url in corpus.urls("catalogue")})
+    if not years:
+        pytest.skip("No catalogue pages in the corpus")
+    if parse_processes:
+        scraper.start_parser_pool(parse_processes)
+    try:
+        entries = benchmark.pedantic(scraper.get_course_catalogue_data, args=(years[0], years[-1]),
+                                     kwargs={"workers": 16}, rounds=1, iterations=1)
+    finally:
+        scraper.stop_parser_pool()
+    assert entries
+    report(benchmark, replay.requests)
+
+
+def portal_pages(corpus):
+    """Number of distinct portal pages a full crawl has to fetch."""
+    return sum(len(corpus.urls(page_type)) for page_type in PORTAL_PARSERS)
+
+
+def test_crawl_sequential(benchmark, corpus, replay):
+    links = benchmark.pedantic(scraper.retrieve_lecture_links, rounds=1, iterations=1)
+    assert len(links) == len(corpus.urls("json"))
+    assert replay.requests == portal_pages(corpus)  # every page is fetched exactly once
+    report(benchmark, replay.requests)
+
+
+def test_crawl_async(benchmark, corpus, replay):
+    links = benchmark.pedantic(crawl_lecture_links, kwargs={"max_concurrency": 16}, rounds=1, iterations=1)
+    assert len(links) == len(corpus.urls("json"))
+    assert replay.requests == portal_pages(corpus)
+    report(benchmark, replay.requests)
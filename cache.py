@@ -0,0 +1,205 @@
+"""
+This module provides a persistent HTTP response cache used by `scraper.get_html`.
+Bodies are stored zlib-compressed in a SQLite file keyed by URL. Stale entries are revalidated with
+ETag/Last-Modified, freshness is configured per URL pattern, and the cache is kept below a size limit by
+evicting the least recently used entries.
+
+The database runs in WAL mode with relaxed syncing, and cache hits only note their access time in memory: the times
+are written in batches, so serving a page from the cache costs no write.
+"""
+
+import os
+import re
+import time
+import zlib
+import sqlite3
+import threading
+from datetime import date
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# number of access times noted by cache hits before they are written
+ACCESS_BATCH = 256
+
+
+def default_ttls(current_year=None):
+    """
+    Builds the default freshness rules: pages of the current year change frequently, pages of past years
+    (both video portal semesters and catalogue semesters) hardly ever do.
+
+    Args:
+        current_year (int, optional): The year considered to be ongoing, defaults to today's year.
+
+    Returns:
+        list: A list of (regex, ttl in seconds) tuples, the first matching rule applies.
+    """
+    year = current_year or date.today().year
+    return [
+        (rf"/lectures/[^/]+/{year}\b|semkez={year}", HOUR),
+        (r"/lectures/[^/]+/\d{4}\b|semkez=\d{4}", 30 * DAY),
+    ]
+
+
+class CachedResponse:
+    """A cached response body together with its validators."""
+
+    def __init__(self, body, etag, last_modified, fresh):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fresh = fresh
+
+    def conditional_headers(self):
+        """Returns the headers needed to revalidate this response with the origin."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HTTPCache:
+    """
+    A thread-safe on-disk cache of HTTP response bodies.
+
+    Args:
+        path (str): Directory holding the cache database.
+        max_bytes (int): Upper bound on the total size of the stored (compressed) bodies.
+        ttls (list, optional): (regex, seconds) freshness rules, see `default_ttls`.
+        default_ttl (int): Freshness of URLs not matched by any rule.
+    """
+
+    def __init__(self, path=".http_cache", max_bytes=512 * 1024 * 1024, ttls=None, default_ttl=DAY):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (ttls if ttls is not None else default_ttls())]
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._accessed = {}  # url -> access time not yet written
+        self._total = 0  # size of the stored bodies
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.path, "responses.db"), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    body BLOB,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL,
+                    accessed_at REAL,
+                    size INTEGER
+                )
+            ''')
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        return self._conn
+
+    def _write_accesses(self, conn):
+        if self._accessed:
+            conn.executemany("UPDATE responses SET accessed_at = ? WHERE url = ?",
+                             [(accessed, url) for url, accessed in self._accessed.items()])
+            self._accessed.clear()
+
+    def ttl_for(self, url):
+        """Returns the freshness lifetime in seconds for a URL."""
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def lookup(self, url):
+        """
+        Looks up a URL in the cache.
+
+        Args:
+            url (str): The requested URL.
+
+        Returns:
+            CachedResponse: The cached response, or None if the URL has not been cached.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            self._accessed[url] = now
+            if len(self._accessed) >= ACCESS_BATCH:
+                self._write_accesses(conn)
+                conn.commit()
+
+        body, etag, last_modified, fetched_at = row
+        fresh = now - fetched_at < self.ttl_for(url)
+        return CachedResponse(zlib.decompress(body), etag, last_modified, fresh)
+
+    def revalidated(self, url):
+        """Marks a cached response as fresh again after the origin answered 304 Not Modified."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            self._accessed.pop(url, None)
+            conn.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            conn.commit()
+
+    def store(self, url, content, etag=None, last_modified=None):
+        """
+        Stores a response body and evicts least recently used entries if the cache grew too large.
+
+        Args:
+            url (str): The requested URL.
+            content (bytes): The response body.
+            etag (str, optional): The ETag header of the response.
+            last_modified (str, optional): The Last-Modified header of the response.
+        """
+        body = zlib.compress(content)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            self._accessed.pop(url, None)
+            replaced = conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, now, now, len(body)))
+            self._total += len(body) - (replaced[0] if replaced else 0)
+            if self._total > self.max_bytes:
+                self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        self._write_accesses(conn)
+        while self._total > self.max_bytes:
+            rows = conn.execute("SELECT url, size FROM responses ORDER BY accessed_at LIMIT 64").fetchall()
+            if not rows:
+                break
+            for url, size in rows:
+                if self._total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._total -= size
+
+    def close(self):
+        """Writes pending access times and closes the cache database."""
+        with self._lock:
+            if self._conn is not None:
+                self._write_accesses(self._conn)
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+    def clear(self):
+        """Removes all cached responses."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+            self._accessed.clear()
+            self._total = 0
@@ -0,0 +1,146 @@
+"""
+This module provides a streaming extractor for the result tables of ETH's course catalogue (vvz.ethz.ch).
+Rows are processed one at a time as the page is parsed: the first cell is checked against the course number pattern
+before anything else is kept, only the columns of a catalogue entry are turned into text, and finished rows are
+discarded, so memory stays bounded even for pages with thousands of rows.
+"""
+
+import re
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+COURSE_NUMBER = re.compile(r'\d{3}-\d{4}-\d{2}L')
+
+# column index -> field of a catalogue entry
+KEPT_COLUMNS = {0: "number", 1: "title", 3: "credits", 4: "lecture/recitation"}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def make_entry(cells, year, semester):
+    """
+    Builds a catalogue entry from the kept cells of a row, or returns None if the row is not a lecture.
+
+    Args:
+        cells (dict): Column index -> stripped cell text, for the columns in `KEPT_COLUMNS`.
+        year (int): The year the page belongs to.
+        semester (str): The semester ('W' or 'S') the page belongs to.
+
+    Returns:
+        dict: The catalogue entry, or None.
+    """
+    if len(cells) < len(KEPT_COLUMNS) or "V" not in cells[4]:
+        return None
+    return {
+        "number": cells[0],
+        "title": cells[1],
+        "year": str(year),
+        "semester": semester,
+        "credits": cells[3],
+        "lecture/recitation": cells[4]
+    }
+
+
+def _lxml_rows(content):
+    """Yields the kept cells of every course row of the first table, using lxml's pull parser."""
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    table = None
+
+    for offset in range(0, len(content), CHUNK_SIZE):
+        parser.feed(content[offset:offset + CHUNK_SIZE])
+        for event, element in parser.read_events():
+            if event == "start":
+                if element.tag == "table" and table is None:
+                    table = element
+                continue
+            if element.tag != "tr" or table is None or next(element.iterancestors("table"), None) is not table:
+                continue
+
+            cells = [cell for cell in element if cell.tag in ("td", "th")]
+            if cells and COURSE_NUMBER.match("".join(cells[0].itertext()).strip()):
+                yield {n: "".join(cells[n].itertext()).strip() for n in KEPT_COLUMNS if n < len(cells)}
+
+            # drop the processed row and everything before it
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    parser.close()
+
+
+class _RowParser(HTMLParser):
+    """Event-based fallback collecting the kept cells of the course rows of the first table."""
+
+    def __init__(self):
+        super().__init__()
+        self.rows = []
+        self.tables = 0  # number of tables seen so far
+        self.depth = 0  # nesting depth of tables, counted only inside the first table
+        self.cells = None
+        self.column = -1
+        self.text = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self.tables += 1
+            if self.depth or self.tables == 1:
+                self.depth += 1
+        elif self.depth == 1 and tag == "tr":
+            self.cells, self.column = {}, -1
+        elif self.depth == 1 and tag in ("td", "th") and self.cells is not None:
+            self.column += 1
+            self.text = [] if self.column in KEPT_COLUMNS else None
+
+    def handle_endtag(self, tag):
+        if tag == "table" and self.depth:
+            self.depth -= 1
+        elif self.depth == 1 and tag in ("td", "th") and self.text is not None:
+            self.cells[self.column] = "".join(self.text).strip()
+            self.text = None
+            # pre-filter: ignore the rest of the row if it does not start with a course number
+            if self.column == 0 and not COURSE_NUMBER.match(self.cells[0]):
+                self.cells = None
+        elif self.depth == 1 and tag == "tr" and self.cells is not None:
+            if self.cells:
+                self.rows.append(self.cells)
+            self.cells = None
+
+    def handle_data(self, data):
+        if self.text is not None:
+            self.text.append(data)
+
+
+def _stdlib_rows(content):
+    """Yields the kept cells of every course row of the first table, using the standard library parser."""
+    parser = _RowParser()
+    text = content.decode("utf-8", errors="replace") if isinstance(content, bytes) else content
+    for offset in range(0, len(text), CHUNK_SIZE):
+        parser.feed(text[offset:offset + CHUNK_SIZE])
+        yield from parser.rows
+        parser.rows = []
+    parser.close()
+    yield from parser.rows
+
+
+def iter_catalogue_entries(content, year, semester=None, backend=None):
+    """
+    Streams the lecture entries out of a course catalogue results page.
+
+    Args:
+        content (bytes): The raw HTML of the results page.
+        year (int): The year the page belongs to.
+        semester (str, optional): The semester ('W' or 'S') the page belongs to.
+        backend (str, optional): 'lxml' or 'html.parser', defaults to lxml when installed.
+
+    Yields:
+        dict: Catalogue entries, see `make_entry`.
+    """
+    backend = backend or ("lxml" if etree is not None else "html.parser")
+    rows = _lxml_rows(content) if backend == "lxml" else _stdlib_rows(content)
+    for cells in rows:
+        entry = make_entry(cells, year, semester)
+        if entry:
+            yield entry
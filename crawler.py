@@ -0,0 +1,101 @@
+"""
+This module provides an asynchronous crawl engine for the 'video.ethz.ch' lecture hierarchy.
+Every level of the tree (departments, years, semesters, lectures) is fanned out concurrently, so the
+duration of a crawl is set by its slowest branch rather than by the sum of all requests.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from links import VisitedSet
+from scraper import get_links
+
+
+class AsyncCrawler:
+    """
+    Crawls the lecture hierarchy concurrently, bounded by a global and a per-host concurrency limit.
+
+    Blocking fetches are dispatched to a thread pool sized to the global limit, so at most
+    `max_concurrency` requests are in flight at any time, and at most `max_per_host` against one host.
+    Links are deduplicated across the whole crawl by canonical URL before they are fetched.
+    """
+
+    def __init__(self, max_concurrency=16, max_per_host=8):
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self._global = None
+        self._hosts = {}
+        self._executor = None
+        self.visited = VisitedSet()
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.max_per_host)
+        return self._hosts[host]
+
+    async def _expand(self, url, level):
+        """
+        Fetches a page and returns the links to its child pages (see `scraper.LINK_FILTERS`) that were not seen
+        before in this crawl, [] on failure.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._global, self._host_semaphore(url):
+            links = await loop.run_in_executor(self._executor, get_links, url, level)
+        return self.visited.filter(links or [])
+
+    async def crawl_semester(self, semester_url):
+        return await self._expand(semester_url, "semester")
+
+    async def crawl_year(self, year_url):
+        semesters = await self._expand(year_url, "year")
+        results = await asyncio.gather(*(self.crawl_semester(s) for s in semesters))
+        return [link for lectures in results for link in lectures]
+
+    async def crawl_department(self, department_url):
+        years = await self._expand(department_url, "department")
+        results = await asyncio.gather(*(self.crawl_year(y) for y in years))
+        links = [link for lectures in results for link in lectures]
+        print(f"Completed link retrieval for {department_url}, found {len(set(links))} links")
+        return links
+
+    async def crawl(self, url="https://video.ethz.ch/"):
+        """
+        Crawls all departments reachable from the main site.
+
+        Args:
+            url (str): The URL of the main site.
+
+        Returns:
+            list: All unique lecture links found on the site.
+        """
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._hosts = {}
+        self.visited = VisitedSet()
+        self.visited.add(url)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            self._executor = executor
+            departments = await self._expand(url, "root")
+            results = await asyncio.gather(*(self.crawl_department(d) for d in departments))
+        self._executor = None
+
+        unique_links = list({link for lectures in results for link in lectures})
+        print(f"Total unique lecture links retrieved: {len(unique_links)}")
+        return unique_links
+
+
+def crawl_lecture_links(url="https://video.ethz.ch/", max_concurrency=16, max_per_host=8):
+    """
+    Concurrent counterpart of `scraper.retrieve_lecture_links`.
+
+    Args:
+        url (str): The URL of the main site.
+        max_concurrency (int): Maximum number of requests in flight overall.
+        max_per_host (int): Maximum number of requests in flight against a single host.
+
+    Returns:
+        list: All unique lecture links found on the site.
+    """
+    crawler = AsyncCrawler(max_concurrency=max_concurrency, max_per_host=max_per_host)
+    return asyncio.run(crawler.crawl(url))
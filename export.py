@@ -0,0 +1,150 @@
+"""
+This module exports the `lectures` and `catalogue` tables of 'lecture_data.db' to Parquet datasets.
+Lectures are partitioned by department and year, catalogue entries by year (hive-style directories such as
+`lectures/department=d-phys/year=2020/`). The datasets are read back through memory-mapped Arrow with column and
+partition pruning, so analyses only load the columns and partitions they need.
+
+Usage:
+    python export.py [--db lecture_data.db] [--out data/parquet]
+"""
+
+import os
+import sqlite3
+import argparse
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+from storage import connect, DB_PATH, LECTURE_COLUMNS, CATALOGUE_COLUMNS
+
+EXPORT_DIR = os.path.join("data", "parquet")
+
+BATCH_SIZE = 50000
+
+ARROW_TYPES = {"TEXT": pa.string(), "INTEGER": pa.int64()}
+
+# table -> (columns, partition columns)
+TABLES = {
+    "lectures": (LECTURE_COLUMNS, ["department", "year"]),
+    "catalogue": (CATALOGUE_COLUMNS, ["year"]),
+}
+
+
+def _schema(columns):
+    return pa.schema([(column, ARROW_TYPES[kind]) for column, kind in columns.items()])
+
+
+def _batches(conn, table, schema, batch_size):
+    """Reads a table in record batches, so the export never holds the whole table in memory."""
+    names = ", ".join(f'"{name}"' for name in schema.names)
+    cursor = conn.execute(f"SELECT {names} FROM {table}")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(zip(*rows), schema)], schema=schema)
+
+
+def export_parquet(db_path=DB_PATH, out_dir=EXPORT_DIR, tables=None, batch_size=BATCH_SIZE):
+    """
+    Writes tables of the lecture database to partitioned Parquet datasets.
+
+    Partitions present in the database replace their previous export; partitions that no longer have rows are kept.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        out_dir (str): Directory holding one dataset per table.
+        tables (list, optional): Tables to export, defaults to all of `TABLES`.
+        batch_size (int): Number of rows read from SQLite at a time.
+
+    Returns:
+        dict: The number of rows exported per table.
+    """
+    unknown = set(tables or []) - set(TABLES)
+    if unknown:
+        raise ValueError(f"Unknown tables {sorted(unknown)}, choose from {list(TABLES)}")
+    connect(db_path).close()  # make sure the schema exists
+    # pyarrow consumes the batches on one of its own threads
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    exported = {}
+    for table in tables or TABLES:
+        columns, partitions = TABLES[table]
+        schema = _schema(columns)
+        rows = 0
+
+        def counted(batches):
+            nonlocal rows
+            for batch in batches:
+                rows += batch.num_rows
+                yield batch
+
+        ds.write_dataset(
+            counted(_batches(conn, table, schema, batch_size)),
+            os.path.join(out_dir, table),
+            schema=schema,
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema([schema.field(name) for name in partitions]), flavor="hive"),
+            existing_data_behavior="delete_matching",
+        )
+        exported[table] = rows
+        print(f"Exported {rows} rows of {table} to {os.path.join(out_dir, table)}")
+    conn.close()
+    return exported
+
+
+def open_dataset(table, out_dir=EXPORT_DIR):
+    """
+    Opens an exported table as a memory-mapped Arrow dataset.
+
+    Args:
+        table (str): 'lectures' or 'catalogue'.
+        out_dir (str): Directory the datasets were exported to.
+
+    Returns:
+        pyarrow.dataset.Dataset: The dataset, with partition columns typed as in the database.
+    """
+    columns, partitions = TABLES[table]
+    schema = _schema(columns)
+    return ds.dataset(
+        os.path.join(out_dir, table),
+        schema=schema,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([schema.field(name) for name in partitions]), flavor="hive"),
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def read_dataset(table, columns=None, filters=None, out_dir=EXPORT_DIR):
+    """
+    Reads an exported table into a pandas DataFrame, loading only the requested columns and matching partitions.
+
+    Args:
+        table (str): 'lectures' or 'catalogue'.
+        columns (list, optional): Columns to load, defaults to all.
+        filters (list, optional): Row filters such as `[("year", ">=", "2020"), ("department", "in", ["d-phys"])]`,
+            or a pyarrow expression.
+        out_dir (str): Directory the datasets were exported to.
+
+    Returns:
+        pandas.DataFrame: The selected data.
+    """
+    if isinstance(filters, list):
+        filters = pq.filters_to_expression(filters)
+    return open_dataset(table, out_dir).to_table(columns=columns, filter=filters).to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the lecture database to partitioned Parquet datasets.")
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    parser.add_argument("--out", default=EXPORT_DIR, help="output directory")
+    parser.add_argument("--tables", nargs="+", choices=list(TABLES), help="tables to export (default: all)")
+    args = parser.parse_args()
+
+    export_parquet(args.db, args.out, args.tables)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+This module persists the crawl state of the 'video.ethz.ch' lecture hierarchy in SQLite.
+Every discovered URL is stored in a frontier table together with its level, status, last fetch time and content hash,
+so an interrupted crawl continues where it stopped and incremental runs only revisit pages that can still change.
+"""
+
+import re
+import time
+import hashlib
+import sqlite3
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+
+from links import canonical_url
+from metrics import METRICS
+import scraper
+from scraper import fetch, run_parser, parse_links
+
+ROOT_URL = "https://video.ethz.ch/"
+
+# level of a page -> level of its children (see scraper.LINK_FILTERS for the link filters)
+LEVELS = {
+    "root": "department",
+    "department": "year",
+    "year": "semester",
+    "semester": "lecture",
+}
+
+YEAR_PATTERN = re.compile(r"/lectures/[^/]+/(\d{4})")
+
+DEPARTMENT_PATTERN = re.compile(r"/lectures/([^/.]+)")
+
+
+def url_year(url):
+    """Returns the year encoded in a portal URL, or None for the main site and department pages."""
+    match = YEAR_PATTERN.search(url)
+    return int(match.group(1)) if match else None
+
+
+def url_department(url):
+    """Returns the department encoded in a portal URL (e.g. 'd-phys'), or None for the main site."""
+    match = DEPARTMENT_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def in_scope(url, departments=None, years=None):
+    """
+    Checks whether a portal URL belongs to the selected departments and years. Pages above the level a filter
+    applies to (e.g. the main site for departments) are always in scope.
+
+    Args:
+        url (str): A portal URL.
+        departments (iterable, optional): Departments to keep, e.g. ['d-phys'], defaults to all.
+        years (iterable, optional): Years to keep, defaults to all.
+
+    Returns:
+        bool: Whether the URL is in scope.
+    """
+    department, year = url_department(url), url_year(url)
+    if departments and department is not None and department not in departments:
+        return False
+    if years and year is not None and year not in years:
+        return False
+    return True
+
+
+class Frontier:
+    """
+    The crawl frontier stored in the `frontier` table of the lecture database.
+
+    Pages have the status 'pending' until they were fetched successfully ('done') or failed ('failed').
+    Lecture rows are leaves of the crawl: they stay 'pending' until their metadata has been harvested.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+    """
+
+    def __init__(self, db_path="lecture_data.db"):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                level TEXT NOT NULL,
+                year INTEGER,
+                status TEXT NOT NULL DEFAULT 'pending',
+                last_fetched REAL,
+                content_hash TEXT
+            )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS frontier_level_status ON frontier (level, status)")
+        self.conn.commit()
+
+    def add(self, urls, level):
+        """
+        Adds newly discovered URLs as pending, leaving already known URLs untouched. URLs are stored in canonical
+        form, so the table doubles as the persistent visited set of the crawl.
+        """
+        urls = {canonical_url(url) for url in urls}
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO frontier (url, level, year) VALUES (?, ?, ?)",
+            [(url, level, url_year(url)) for url in urls])
+
+    def pending(self, levels):
+        """Returns the pending URLs of the given levels."""
+        placeholders = ", ".join("?" * len(levels))
+        rows = self.conn.execute(
+            f"SELECT url, level FROM frontier WHERE status = 'pending' AND level IN ({placeholders})",
+            list(levels)).fetchall()
+        return rows
+
+    def mark(self, url, status, content_hash=None):
+        """Records the outcome of fetching a URL."""
+        self.conn.execute(
+            "UPDATE frontier SET status = ?, last_fetched = ?, content_hash = COALESCE(?, content_hash) WHERE url = ?",
+            (status, time.time(), content_hash, url))
+
+    def reopen(self, current_year):
+        """
+        Marks the pages that can still change as pending again: the main site, the department pages (which list
+        the available years) and everything belonging to the current year, including its lecture series.
+        """
+        self.conn.execute('''
+            UPDATE frontier SET status = 'pending'
+            WHERE level IN ('root', 'department') OR year >= ?
+        ''', (current_year,))
+        self.conn.commit()
+
+    def retry_failed(self):
+        """Marks pages that failed in an earlier run as pending again."""
+        self.conn.execute("UPDATE frontier SET status = 'pending' WHERE status = 'failed' AND level != 'lecture'")
+
+    def lecture_links(self, status=None):
+        """Returns the discovered lecture links, optionally restricted to a status."""
+        if status is None:
+            rows = self.conn.execute("SELECT url FROM frontier WHERE level = 'lecture'")
+        else:
+            rows = self.conn.execute("SELECT url FROM frontier WHERE level = 'lecture' AND status = ?", (status,))
+        return [row[0] for row in rows]
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def _visit(url, level):
+    """Fetches a page and returns its content hash and child links."""
+    content = fetch(url)
+    children = run_parser(parse_links, content, level, url, scraper.LINK_BACKEND)
+    return hashlib.sha256(content).hexdigest(), LEVELS[level], children
+
+
+def crawl_frontier(db_path="lecture_data.db", incremental=False, workers=8, current_year=None,
+                   departments=None, years=None):
+    """
+    Crawls the lecture hierarchy, persisting progress after every page.
+
+    A fresh database is seeded with the main site. On a restart, only pages still marked as pending are fetched.
+    In incremental mode, finished years are left as they are and only pages of the current year are revisited.
+    Links outside the selected departments and years are recorded as well, but stay pending until a crawl selects them.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        incremental (bool): Whether to revisit the pages that can change since the last run.
+        workers (int): Number of pages fetched in parallel.
+        current_year (int, optional): The year considered to be ongoing, defaults to today's year.
+        departments (iterable, optional): Only crawl these departments, e.g. ['d-phys'].
+        years (iterable, optional): Only crawl these years.
+
+    Returns:
+        list: All lecture links known to the frontier (within the selected departments and years).
+    """
+    frontier = Frontier(db_path)
+    frontier.add([ROOT_URL], "root")
+    frontier.retry_failed()
+    if incremental:
+        frontier.reopen(current_year or date.today().year)
+    frontier.commit()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = [(url, level) for url, level in frontier.pending(LEVELS) if in_scope(url, departments, years)]
+            if not batch:
+                break
+
+            futures = {executor.submit(_visit, url, level): url for url, level in batch}
+            for future, url in futures.items():
+                try:
+                    content_hash, child_level, children = future.result()
+                except Exception as e:  # one broken page must not abort the crawl, it is retried on the next run
+                    print(f"Error crawling {url}: {e}")
+                    frontier.mark(url, "failed")
+                else:
+                    with METRICS.stage("persist"):
+                        frontier.add(children, child_level)
+                        frontier.mark(url, "done", content_hash)
+                frontier.commit()
+
+    links = [link for link in frontier.lecture_links() if in_scope(link, departments, years)]
+    frontier.close()
+    print(f"Total unique lecture links retrieved: {len(links)}")
+    return links
@@ -0,0 +1,44 @@
+"""
+This module provides parallel retrieval of lecture metadata from the 'video.ethz.ch' website.
+The series metadata of many lectures is fetched on a worker pool, while progress and failures are reported as they arrive.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+
+from scraper import retrieve_meta_data
+
+
+def harvest_metadata(urls, workers=8, on_result=None):
+    """
+    Retrieves the metadata of many lectures concurrently.
+
+    Args:
+        urls (iterable): URLs of the lectures.
+        workers (int): Number of worker threads fetching metadata in parallel.
+        on_result (callable, optional): Called as `on_result(url, metadata)` in completion order as soon as a
+            lecture has been processed successfully.
+
+    Returns:
+        tuple: A list of metadata dictionaries in the order of `urls`, and a list of the URLs that failed.
+    """
+    urls = list(urls)
+    results = [None] * len(urls)
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(retrieve_meta_data, url): n for n, url in enumerate(urls)}
+
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Retrieving metadata", unit="link"):
+            n = futures[future]
+            try:
+                results[n] = future.result()
+            except Exception as e:
+                tqdm.write(f"Failed to retrieve {urls[n]}: {e}")
+                failed.append(n)
+                continue
+            if on_result:
+                on_result(urls[n], results[n])
+
+    data = [meta for meta in results if meta is not None]
+    return data, [urls[n] for n in sorted(failed)]
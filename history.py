@@ -0,0 +1,160 @@
+"""
+This module queries the version history of the lecture series kept in `lecture_history` (see storage.py).
+A version is written only when the metadata of a series changes, and is valid from the moment it was written until
+the next change, so the state of the portal can be reconstructed for any point in time and changes such as a series
+switching between public and restricted access can be listed.
+
+Timestamps are UTC strings ('2024-03-01 12:00:00.000'); a date such as '2024-03-01' stands for the start of that day.
+
+Usage:
+    python history.py runs
+    python history.py as-of 2024-03-01 [--department d-phys]
+    python history.py changes [--since 2024-03-01] [--until 2024-04-01] [--runs 3 4] [--access]
+"""
+
+import argparse
+from contextlib import contextmanager
+
+from storage import connect, DB_PATH, NOW
+
+HISTORY_FIELDS = ["url", "title", "department", "year", "semester", "lecturer", "access", "valid_from", "valid_to"]
+
+
+@contextmanager
+def snapshot_run(db_path=DB_PATH):
+    """
+    Records a harvesting run in `snapshot_runs`, so changes can later be listed per run.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+
+    Yields:
+        int: The id of the run.
+    """
+    conn = connect(db_path)
+    with conn:
+        run_id = conn.execute(f"INSERT INTO snapshot_runs (started) VALUES ({NOW})").lastrowid
+    try:
+        yield run_id
+    finally:
+        with conn:
+            conn.execute(f"UPDATE snapshot_runs SET finished = {NOW} WHERE id = ?", (run_id,))
+        conn.close()
+
+
+def runs(conn):
+    """Returns the recorded runs as (id, started, finished) tuples, oldest first."""
+    return conn.execute("SELECT id, started, finished FROM snapshot_runs ORDER BY id").fetchall()
+
+
+def run_window(conn, first_run, second_run):
+    """
+    Returns the time window of the changes made after one run and up to the end of a later one.
+
+    Args:
+        conn (sqlite3.Connection): An open connection, see `storage.connect`.
+        first_run (int): Id of the earlier run.
+        second_run (int): Id of the later run.
+
+    Returns:
+        tuple: (since, until) timestamps for `changes`.
+    """
+    finished = dict(conn.execute("SELECT id, COALESCE(finished, " + NOW + ") FROM snapshot_runs"))
+    missing = {first_run, second_run} - set(finished)
+    if missing:
+        raise ValueError(f"Unknown runs {sorted(missing)}")
+    return finished[first_run], finished[second_run]
+
+
+def as_of(conn, when, department=None):
+    """
+    Returns the state of all lecture series at a point in time.
+
+    Args:
+        conn (sqlite3.Connection): An open connection, see `storage.connect`.
+        when (str): A timestamp or date.
+        department (str, optional): Only return series of this department, e.g. 'd-phys'.
+
+    Returns:
+        list: A dictionary per series with the fields of `HISTORY_FIELDS`.
+    """
+    query = f'''
+        SELECT {", ".join(HISTORY_FIELDS)} FROM lecture_history
+        WHERE valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)
+    '''
+    params = [str(when), str(when)]
+    if department:
+        query += " AND department = ?"
+        params.append(department.lower())
+    return [dict(zip(HISTORY_FIELDS, row)) for row in conn.execute(query + " ORDER BY url", params)]
+
+
+def changes(conn, since=None, until=None, access_only=False):
+    """
+    Lists the changes of lecture series within a time window.
+
+    Args:
+        conn (sqlite3.Connection): An open connection, see `storage.connect`.
+        since (str, optional): Start of the window (exclusive), defaults to the beginning of the history.
+        until (str, optional): End of the window (inclusive), defaults to now.
+        access_only (bool): Only list series whose access status changed.
+
+    Returns:
+        list: Dictionaries with url, title, changed (timestamp), change ('added', 'changed' or 'removed'),
+            old_access and new_access, in chronological order.
+    """
+    since, until = since or "", until or "9999"
+    rows = conn.execute('''
+        SELECT new.url, new.title, new.valid_from AS changed,
+               CASE WHEN old.url IS NULL THEN 'added' ELSE 'changed' END, old.access, new.access
+        FROM lecture_history new
+        LEFT JOIN lecture_history old ON old.url = new.url AND old.valid_to = new.valid_from
+        WHERE new.valid_from > ? AND new.valid_from <= ?
+        UNION ALL
+        SELECT old.url, old.title, old.valid_to, 'removed', old.access, NULL
+        FROM lecture_history old
+        WHERE old.valid_to > ? AND old.valid_to <= ? AND NOT EXISTS (
+            SELECT 1 FROM lecture_history new WHERE new.url = old.url AND new.valid_from = old.valid_to)
+        ORDER BY changed
+    ''', (since, until, since, until))
+    fields = ["url", "title", "changed", "change", "old_access", "new_access"]
+    result = [dict(zip(fields, row)) for row in rows]
+    if access_only:
+        result = [row for row in result if row["change"] == "changed" and row["old_access"] != row["new_access"]]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the version history of the lecture series.")
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("runs", help="list the recorded harvesting runs")
+    command = commands.add_parser("as-of", help="state of the series at a point in time")
+    command.add_argument("when", help="timestamp or date, e.g. 2024-03-01")
+    command.add_argument("--department", help="only show series of this department")
+    command = commands.add_parser("changes", help="changes within a time window")
+    command.add_argument("--since", help="start of the window (exclusive)")
+    command.add_argument("--until", help="end of the window (inclusive)")
+    command.add_argument("--runs", nargs=2, type=int, metavar=("FIRST", "SECOND"),
+                         help="changes made after the first run, up to the end of the second")
+    command.add_argument("--access", action="store_true", help="only series whose access status changed")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == "runs":
+        for run_id, started, finished in runs(conn):
+            print(f"{run_id}: {started} - {finished or 'unfinished'}")
+    elif args.command == "as-of":
+        series = as_of(conn, args.when, args.department)
+        accessible = sum(1 for entry in series if entry["access"] == 1)
+        print(f"{len(series)} lecture series as of {args.when}, {accessible} publicly accessible")
+    else:
+        since, until = run_window(conn, *args.runs) if args.runs else (args.since, args.until)
+        for change in changes(conn, since, until, args.access):
+            access = f"access {change['old_access']} -> {change['new_access']}"
+            print(f"{change['changed']}  {change['change']:<8} {access}  {change['url']}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
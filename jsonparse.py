@@ -0,0 +1,69 @@
+"""
+This module provides fast decoding of the series metadata JSON served by 'video.ethz.ch'.
+Bodies are decoded straight from bytes with orjson or ujson when installed, and a projection mode reduces a document to
+the few fields needed for a metadata record as soon as it is decoded.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+DECODERS = {"json": json.loads}
+if ujson is not None:
+    DECODERS["ujson"] = ujson.loads
+if orjson is not None:
+    DECODERS["orjson"] = orjson.loads
+
+# fastest installed decoder
+DEFAULT_BACKEND = "orjson" if orjson is not None else "ujson" if ujson is not None else "json"
+
+
+def loads(content, backend=None):
+    """
+    Decodes a JSON document from raw bytes.
+
+    Args:
+        content (bytes): The raw JSON body.
+        backend (str, optional): One of 'orjson', 'ujson' or 'json', defaults to the fastest installed one.
+
+    Returns:
+        The decoded document.
+
+    Raises:
+        ValueError: If the backend is not installed or the document is not valid JSON.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in DECODERS:
+        raise ValueError(f"JSON backend '{backend}' is not available, choose from {list(DECODERS)}")
+    return DECODERS[backend](content)
+
+
+def project_series(content, backend=None):
+    """
+    Extracts the fields of a series metadata document needed for a metadata record.
+
+    The document is decoded with `loads` and reduced right away, so neither the `episodes` array nor the rest of the
+    document outlive the call.
+
+    Args:
+        content (bytes): The raw series metadata JSON.
+        backend (str, optional): The decoder to use, see `loads`.
+
+    Returns:
+        dict: The title, description, protection, number of episodes ('no_episodes') and the lecturers of the
+            selected episode ('createdBy'), with None for missing fields.
+    """
+    data = loads(content, backend)
+    series = {field: data.get(field) for field in ("title", "description", "protection")}
+    episodes = data.get("episodes")
+    series["no_episodes"] = len(episodes) if episodes is not None else None
+    series["createdBy"] = (data.get("selectedEpisode") or {}).get("createdBy")
+    return series
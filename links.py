@@ -0,0 +1,205 @@
+"""
+This module provides fast extraction of link targets from raw HTML.
+The link filters in `scraper.py` only look at the `href` of anchors, so instead of building a full BeautifulSoup tree
+the page can be scanned for anchors directly, or parsed by one of the faster lxml/selectolax backends.
+It also canonicalises URLs, so that a crawl can recognise variants of a page it has already visited.
+"""
+
+import os
+import re
+import hashlib
+import posixpath
+import threading
+from array import array
+from html import unescape
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+# matches, in document order, comments and script/style blocks (whose content is not markup) and the opening tags of
+# anchors, capturing their attributes; quoted attribute values may contain '>'
+TOKEN_PATTERN = re.compile(
+    rb"""<!--.*?-->|<(script|style)\b.*?</\1\s*>|<a(?=[\s/>])((?:[^>"']|"[^"]*"|'[^']*')*)>""",
+    re.IGNORECASE | re.DOTALL)
+
+# matches an attribute of a tag and captures its name and (quoted or unquoted) value
+ATTRIBUTE_PATTERN = re.compile(rb"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?""")
+
+
+def _decode(value):
+    return unescape(value.decode("utf-8", errors="replace"))
+
+
+def _href(attributes):
+    for m in ATTRIBUTE_PATTERN.finditer(attributes):
+        if m.group(1).lower() == b"href":
+            return m.group(2) or m.group(3) or m.group(4) or b""
+    return None
+
+
+def scan_hrefs(content):
+    """
+    Scans raw HTML for anchor hrefs without building a document tree. Anchors inside comments and script or style
+    blocks are skipped, as they are by an HTML parser.
+
+    Args:
+        content (bytes): The raw HTML.
+
+    Returns:
+        list: The href of every anchor, in document order.
+    """
+    hrefs = []
+    for m in TOKEN_PATTERN.finditer(content):
+        if m.group(2) is not None:
+            href = _href(m.group(2))
+            if href is not None:
+                hrefs.append(_decode(href))
+    return hrefs
+
+
+def lxml_hrefs(content):
+    """Extracts anchor hrefs using lxml's HTML parser."""
+    if not content.strip():
+        return []
+    return lxml.html.fromstring(content).xpath("//a/@href")
+
+
+def selectolax_hrefs(content):
+    """Extracts anchor hrefs using selectolax's HTML parser."""
+    return [node.attributes["href"] or "" for node in HTMLParser(content).css("a[href]")]
+
+
+def soup_hrefs(content):
+    """Extracts anchor hrefs from a full BeautifulSoup tree (reference implementation)."""
+    from bs4 import BeautifulSoup
+
+    return [link["href"] for link in BeautifulSoup(content, "html.parser").find_all("a", href=True)]
+
+
+BACKENDS = {
+    "scanner": scan_hrefs,
+    "lxml": lxml_hrefs,
+    "selectolax": selectolax_hrefs,
+    "bs4": soup_hrefs,
+}
+
+
+def available_backends():
+    """Returns the names of the backends whose dependencies are installed."""
+    missing = {"lxml": lxml is None, "selectolax": HTMLParser is None}
+    return [name for name in BACKENDS if not missing.get(name)]
+
+
+def extract_hrefs(content, backend="scanner"):
+    """
+    Extracts the href of every anchor from raw HTML.
+
+    Args:
+        content (bytes): The raw HTML.
+        backend (str): One of 'scanner' (default), 'lxml', 'selectolax' or 'bs4'.
+
+    Returns:
+        list: The href of every anchor, in document order.
+
+    Raises:
+        ValueError: If the backend is unknown or its dependency is not installed.
+    """
+    if backend not in available_backends():
+        raise ValueError(f"Link extraction backend '{backend}' is not available, choose from {available_backends()}")
+    return BACKENDS[backend](content)
+
+
+# hosts whose pages do not depend on the query string, and hosts only served over https
+QUERYLESS_HOSTS = {"video.ethz.ch"}
+HTTPS_HOSTS = {"video.ethz.ch", "www.vvz.ethz.ch"}
+
+
+def canonical_url(url):
+    """
+    Normalises a URL so that variants of the same page compare equal: the scheme and host are lower-cased, default
+    ports, fragments, empty path segments, dot segments and trailing slashes are removed, and the query string is
+    dropped for hosts that ignore it (otherwise its parameters are sorted).
+
+    Args:
+        url (str): An absolute URL.
+
+    Returns:
+        str: The canonical URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme, host = parts.scheme.lower(), (parts.hostname or "").lower()
+    if host in HTTPS_HOSTS:
+        scheme = "https"
+    netloc = host
+    if parts.port and parts.port != {"http": 80, "https": 443}.get(scheme):
+        netloc += f":{parts.port}"
+
+    path = "/" + posixpath.normpath(parts.path).lstrip("/") if parts.path.strip("/") else "/"
+
+    query = "" if host in QUERYLESS_HOSTS else urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+class VisitedSet:
+    """
+    Thread-safe set of the URLs a crawl has already scheduled, compared by canonical form.
+
+    Only a 64-bit hash of every canonical URL is kept (8 bytes instead of a string per URL); collisions are
+    negligible at the size of the site. The set can be persisted to a file to carry it over to another run.
+
+    Args:
+        path (str, optional): File the set is loaded from if it exists, and saved to by `save`.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._hashes = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            hashes = array("Q")
+            with open(path, "rb") as f:
+                hashes.frombytes(f.read())
+            self._hashes.update(hashes)
+
+    @staticmethod
+    def _hash(url):
+        return int.from_bytes(hashlib.blake2b(canonical_url(url).encode(), digest_size=8).digest(), "little")
+
+    def add(self, url):
+        """
+        Marks a URL as visited.
+
+        Returns:
+            bool: True if the URL (in any variant) was not visited before, i.e. whether it should be fetched.
+        """
+        key = self._hash(url)
+        with self._lock:
+            if key in self._hashes:
+                return False
+            self._hashes.add(key)
+            return True
+
+    def filter(self, urls):
+        """Returns the canonical form of the URLs not visited before, marking them as visited."""
+        return [canonical_url(url) for url in urls if self.add(url)]
+
+    def __contains__(self, url):
+        return self._hash(url) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def save(self, path=None):
+        """Writes the set to `path` (defaults to the path it was created with)."""
+        with self._lock:
+            hashes = array("Q", self._hashes)
+        with open(path or self.path, "wb") as f:
+            f.write(hashes.tobytes())
@@ -1,52 +1,199 @@
-from scraper import *
-from tqdm import tqdm
-from sqlalchemy import create_engine, text
-import pandas as pd
-
-# # Part 1: Retrieve all metadata from video.ethz.ch
-
-# Create a SQLAlchemy engine
-engine = create_engine('sqlite:///lecture_data.db')
-
-# # Retrieve all lecture links from the database
-# with engine.connect() as connection:
-#     links = connection.execute(text("SELECT url FROM lectures")).fetchall()
-
-# # Uncomment to repeform scraping process of links
-# # links = retrieve_lecture_links()
-
-# data = []
-# failed = []
-
-# # Process each link and retrieve metadata
-# for link in tqdm(links, desc="Retrieving metadata", unit="link"):
-#     try:
-#         metadata = retrieve_meta_data(link[0])  # Assuming link is a tuple
-#         data.append(metadata)
-#     except Exception as e:
-#         print(f"Failed to retrieve {link[0]}: {e}")
-#         failed.append(link[0])
-
-# # Report failures
-# print("Failures:")
-# if failed:
-#     for fail in failed:
-#         print(fail)
-# else:
-#     print("None")
-
-# # Convert the scraped data into a pandas DataFrame
-# df = pd.DataFrame(data)
-# # Store the DataFrame in the SQLite database
-# df.to_sql('lectures', engine, if_exists='replace', index=False)
-
-# Part 2: Retrieve all entries from ETH's course catalogue
-
-# Retrieve course catalogue data
-course_data = get_course_catalogue_data()
-
-
-# Convert the course data into a DataFrame
-df_courses = pd.DataFrame(course_data)
-# Append the data to the 'catalogue' table in the database
-df_courses.to_sql('catalogue', engine, if_exists='replace', index=False)
+"""
+Command-line entry point of the data collection and reporting pipeline.
+
+Every stage is a subcommand and only imports the modules it needs:
+
+    python main.py crawl [--incremental] [--departments d-phys d-math] [--years 2018-2023] [--workers 8]
+    python main.py harvest [--all] [--departments ...] [--years ...] [--workers 16]
+    python main.py stream [--departments ...] [--years ...] [--fetch-workers 16] [--batch-size 500]
+    python main.py catalogue [--years 2006-2023] [--workers 8]
+    python main.py match [--threshold 0.7]
+    python main.py report [--figures portal catalogue] [--workers 2] [--force]
+    python main.py export [--tables lectures catalogue] [--out data/parquet]
+
+`--parse-processes N` (before the subcommand) parses pages in N processes instead of the fetching threads, and
+`--transport httpx` fetches them with httpx instead of requests.
+Request and stage metrics of the network stages are exported to the 'metrics' directory after each run.
+"""
+
+import argparse
+
+DB_PATH = "lecture_data.db"
+
+# names of the report figures (visuals.FIGURES), listed here so parsing the command line does not import matplotlib
+FIGURES = ["portal", "catalogue", "coverage"]
+
+
+def year_range(text):
+    """Parses a year ('2020') or an inclusive range of years ('2018-2023') given on the command line."""
+    try:
+        first, _, last = text.partition("-")
+        return list(range(int(first), int(last or first) + 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is neither a year nor a range of years such as 2018-2023")
+
+
+def crawl(args):
+    """Collects lecture links from video.ethz.ch, resuming an interrupted crawl (see frontier.py)."""
+    from frontier import crawl_frontier
+
+    crawl_frontier(args.db, args.incremental, args.workers, departments=args.departments, years=args.years)
+
+
+def harvest(args):
+    """Retrieves the metadata of the crawled lectures and upserts it into the 'lectures' table."""
+    from frontier import Frontier, in_scope
+    from harvester import harvest_metadata
+    from history import snapshot_run
+    from storage import store_lectures
+
+    frontier = Frontier(args.db)
+    statuses = [None] if args.all else ["pending", "failed"]
+    links = [link for status in statuses for link in frontier.lecture_links(status)
+             if in_scope(link, args.departments, args.years)]
+
+    with snapshot_run(args.db):
+        data, failed = harvest_metadata(links, workers=args.workers)
+        store_lectures(data, args.db)
+
+    failures = set(failed)
+    for link in links:
+        frontier.mark(link, "failed" if link in failures else "done")
+    frontier.commit()
+    frontier.close()
+
+    # Report failures
+    print("Failures:")
+    if failed:
+        for fail in failed:
+            print(fail)
+    else:
+        print("None")
+
+
+def stream(args):
+    """Crawls lecture links and stores their metadata in one streaming pass (see pipeline.py)."""
+    from history import snapshot_run
+    from pipeline import Pipeline
+
+    with snapshot_run(args.db):
+        Pipeline(args.db, args.discover_workers, args.fetch_workers, args.build_workers, args.queue_size,
+                 args.batch_size, departments=args.departments, years=args.years).run()
+
+
+def catalogue(args):
+    """Retrieves all entries of ETH's course catalogue and links them to the lecture series."""
+    from scraper import get_course_catalogue_data
+    from storage import store_catalogue
+    from matching import match_catalogue
+
+    years = args.years or list(range(2006, 2024))
+    course_data = get_course_catalogue_data(min(years), max(years), workers=args.workers)
+
+    # Upsert the entries into the 'catalogue' table, keyed by (number, year, semester)
+    store_catalogue(course_data, args.db)
+    match_catalogue(args.db)
+
+
+def match(args):
+    """Links the lecture series to the catalogue courses they record."""
+    from matching import match_catalogue
+
+    matched = match_catalogue(args.db, args.threshold)
+    print(f"Matched {matched} lecture series to catalogue courses")
+
+
+def report(args):
+    """Renders the figures of the report."""
+    from visuals import render_report
+
+    render_report(args.figures, args.db, args.out, args.workers, args.force)
+
+
+def export(args):
+    """Exports the lecture database to partitioned Parquet datasets (see export.py)."""
+    from export import export_parquet
+
+    export_parquet(args.db, args.out, args.tables)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect and evaluate ETH lecture recordings.")
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    parser.add_argument("--parse-processes", type=int, help="parse pages in a pool of this many processes")
+    parser.add_argument("--transport", choices=["requests", "httpx"], default="requests",
+                        help="HTTP client of the scraper (httpx uses HTTP/2 when h2 is installed)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scope = argparse.ArgumentParser(add_help=False)
+    scope.add_argument("--departments", nargs="+", type=str.lower, help="departments to include, e.g. d-phys")
+    scope.add_argument("--years", type=year_range, help="year or range of years to include, e.g. 2018-2023")
+
+    command = commands.add_parser("crawl", parents=[scope], help="collect lecture links from video.ethz.ch")
+    command.add_argument("--incremental", action="store_true", help="only revisit pages that can still change")
+    command.add_argument("--workers", type=int, default=8, help="number of pages fetched in parallel")
+    command.set_defaults(run=crawl, metrics=True)
+
+    command = commands.add_parser("harvest", parents=[scope], help="retrieve the metadata of crawled lectures")
+    command.add_argument("--all", action="store_true", help="also refresh lectures harvested before")
+    command.add_argument("--workers", type=int, default=16, help="number of lectures fetched in parallel")
+    command.set_defaults(run=harvest, metrics=True)
+
+    command = commands.add_parser("stream", parents=[scope], help="crawl and harvest in one streaming pipeline")
+    command.add_argument("--discover-workers", type=int, default=8, help="number of portal pages fetched in parallel")
+    command.add_argument("--fetch-workers", type=int, default=16, help="number of series fetched in parallel")
+    command.add_argument("--build-workers", type=int, default=2, help="number of threads building records")
+    command.add_argument("--queue-size", type=int, default=256, help="capacity of the queues between stages")
+    command.add_argument("--batch-size", type=int, default=500, help="maximum number of rows per transaction")
+    command.set_defaults(run=stream, metrics=True)
+
+    command = commands.add_parser("catalogue", help="retrieve the course catalogue")
+    command.add_argument("--years", type=year_range, help="year or range of years, default 2006-2023")
+    command.add_argument("--workers", type=int, default=8, help="number of pages fetched in parallel")
+    command.set_defaults(run=catalogue, metrics=True)
+
+    command = commands.add_parser("match", help="link lecture series to catalogue courses")
+    command.add_argument("--threshold", type=float, default=0.7, help="minimum title similarity of a match")
+    command.set_defaults(run=match, metrics=False)
+
+    command = commands.add_parser("report", help="render the report figures")
+    command.add_argument("--figures", nargs="+", choices=FIGURES, help="figures to render (default: all)")
+    command.add_argument("--out", default="figures", help="output directory")
+    command.add_argument("--workers", type=int, help="number of rendering processes")
+    command.add_argument("--force", action="store_true", help="render even if the data is unchanged")
+    command.set_defaults(run=report, metrics=False)
+
+    command = commands.add_parser("export", help="export the database to partitioned Parquet datasets")
+    command.add_argument("--tables", nargs="+", help="tables to export, e.g. lectures catalogue (default: all)")
+    command.add_argument("--out", default="data/parquet", help="output directory")
+    command.set_defaults(run=export, metrics=False)
+
+    args = parser.parse_args()
+    # the subcommands recording metrics are those using the scraper
+    scraping = args.metrics
+    if scraping:
+        import scraper
+        from transport import make_transport
+
+        if args.transport != "requests":
+            scraper.TRANSPORT = make_transport(args.transport)
+        if args.parse_processes:
+            scraper.start_parser_pool(args.parse_processes)
+    try:
+        args.run(args)
+    finally:
+        if scraping:
+            scraper.stop_parser_pool()
+            scraper.TRANSPORT.close()  # closes the session of every fetching thread
+            if scraper.CACHE:
+                scraper.CACHE.close()  # writes the access times of cache hits
+
+    if args.metrics:
+        from metrics import METRICS
+
+        # Export request and stage metrics of this run (metrics/metrics.json, metrics/metrics.prom)
+        METRICS.export()
+
+
+if __name__ == "__main__":
+    main()
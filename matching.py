@@ -0,0 +1,229 @@
+"""
+This module links the lecture series of the video portal to the courses of the course catalogue.
+Titles are normalised and every series is only compared with catalogue courses of the same year and semester that
+share a title token (a blocking index instead of comparing all pairs). Candidates are scored by the overlap of their
+character trigrams, and the best candidate above a threshold is stored in the `matches` table, from which per-course
+coverage statistics are computed.
+
+Usage:
+    python matching.py [--db lecture_data.db] [--threshold 0.7]
+"""
+
+import re
+import argparse
+import unicodedata
+from collections import defaultdict
+
+from storage import connect, upsert, DB_PATH, MATCH_COLUMNS, MATCH_KEY, SEMESTER_CODES
+
+THRESHOLD = 0.7
+
+# tokens whose posting list in a block is longer than this are too common to select candidates
+MAX_POSTING = 200
+
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "for", "in", "on", "to", "with", "from", "by", "at",
+    "und", "der", "die", "das", "des", "den", "dem", "fur", "mit", "im", "zu", "zur", "zum", "von", "vom",
+    "am", "auf", "ein", "eine", "einer", "et", "de", "la", "le", "les", "du",
+}
+
+ROMAN_NUMERALS = {"i", "ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x"}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# counts of recorded and accessible series per catalogue course
+course_coverage_qry = '''
+    SELECT c.number, c.year, c.semester, c.title,
+           COUNT(l.url) AS recorded_count,
+           COALESCE(SUM(l.access = 1), 0) AS accessible_count
+    FROM catalogue c
+    LEFT JOIN matches m ON m.number = c.number AND m.year = c.year AND m.semester = c.semester
+    LEFT JOIN lectures l ON l.url = m.url
+    GROUP BY c.number, c.year, c.semester
+'''
+
+# per year: catalogue courses, and how many of them have a (publicly accessible) recording
+coverage_qry = f'''
+    SELECT year,
+           COUNT(*) AS course_count,
+           SUM(recorded_count > 0) AS recorded_count,
+           SUM(accessible_count > 0) AS accessible_count
+    FROM ({course_coverage_qry})
+    GROUP BY year
+    ORDER BY year
+'''
+
+
+def normalize_title(title):
+    """
+    Normalises a course title for matching: accents are removed, the title is lower-cased and split into
+    alphanumeric tokens, and stopwords are dropped.
+
+    Args:
+        title (str): The title as shown on the portal or in the catalogue.
+
+    Returns:
+        tuple: The tokens of the title.
+    """
+    title = unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode().lower()
+    return tuple(token for token in TOKEN_PATTERN.findall(title) if token not in STOPWORDS)
+
+
+def trigrams(tokens):
+    """Returns the character trigrams of a normalised title."""
+    text = " " + " ".join(tokens) + " "
+    return frozenset(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def numerals(tokens):
+    """Returns the numbers of a title (e.g. the 'II' in 'Analysis II'), which have to agree for titles to match."""
+    return frozenset(token for token in tokens if token.isdigit() or token in ROMAN_NUMERALS)
+
+
+def similarity(a, b):
+    """Dice coefficient of two trigram sets."""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class Block:
+    """
+    The catalogue courses of one year and semester, indexed by normalised title and by title token.
+
+    Args:
+        courses (list): (number, title) pairs.
+    """
+
+    def __init__(self, courses):
+        self.numbers = []
+        self.tokens = []
+        self.exact = {}
+        self.postings = defaultdict(list)
+        self._grams = {}  # trigrams are only computed for courses that become candidates
+        for position, (number, title) in enumerate(courses):
+            tokens = normalize_title(title)
+            self.numbers.append(number)
+            self.tokens.append(tokens)
+            self.exact.setdefault(tokens, position)
+            for token in set(tokens):
+                self.postings[token].append(position)
+
+    def grams(self, position):
+        """Trigrams and numerals of a course's title."""
+        if position not in self._grams:
+            tokens = self.tokens[position]
+            self._grams[position] = trigrams(tokens), numerals(tokens)
+        return self._grams[position]
+
+    def candidates(self, tokens):
+        """Positions of the courses sharing a selective token with a title."""
+        lists = sorted((self.postings[token] for token in set(tokens) if token in self.postings), key=len)
+        selective = [positions for positions in lists if len(positions) <= MAX_POSTING] or lists[:1]
+        return set().union(*selective)
+
+    def match(self, title, threshold=THRESHOLD):
+        """
+        Finds the course recorded by a lecture series.
+
+        Args:
+            title (str): Title of the series.
+            threshold (float): Minimum similarity of a match.
+
+        Returns:
+            tuple: (course number, similarity), or None if no course is similar enough.
+        """
+        tokens = normalize_title(title)
+        if not tokens:
+            return None
+        if tokens in self.exact:
+            return self.numbers[self.exact[tokens]], 1.0
+
+        grams, title_numerals = trigrams(tokens), numerals(tokens)
+        best, best_score = None, threshold
+        for position in self.candidates(tokens):
+            course_grams, course_numerals = self.grams(position)
+            if course_numerals != title_numerals:
+                continue
+            score = similarity(grams, course_grams)
+            if score >= best_score:
+                best, best_score = position, score
+        if best is None:
+            return None
+        return self.numbers[best], best_score
+
+
+def build_index(conn):
+    """
+    Builds one `Block` per (year, semester) of the catalogue.
+
+    Args:
+        conn (sqlite3.Connection): An open connection to the lecture database.
+
+    Returns:
+        dict: (year, semester code) -> Block.
+    """
+    courses = defaultdict(list)
+    for number, title, year, semester in conn.execute("SELECT number, title, year, semester FROM catalogue"):
+        courses[(str(year), semester)].append((number, title))
+    return {key: Block(block) for key, block in courses.items()}
+
+
+def find_matches(conn, threshold=THRESHOLD):
+    """
+    Matches every lecture series to a catalogue course of its year and semester.
+
+    Args:
+        conn (sqlite3.Connection): An open connection to the lecture database.
+        threshold (float): Minimum title similarity of a match.
+
+    Yields:
+        dict: A row of the `matches` table.
+    """
+    index = build_index(conn)
+    for url, title, year, semester in conn.execute("SELECT url, title, year, semester FROM lectures"):
+        key = (str(year), SEMESTER_CODES.get(semester, semester))
+        block = index.get(key)
+        result = block.match(title, threshold) if block else None
+        if result:
+            number, score = result
+            yield {"url": url, "number": number, "year": key[0], "semester": key[1], "score": score}
+
+
+def match_catalogue(db_path=DB_PATH, threshold=THRESHOLD):
+    """
+    Rebuilds the `matches` table linking lecture series to catalogue courses.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        threshold (float): Minimum title similarity of a match.
+
+    Returns:
+        int: The number of series matched to a course.
+    """
+    conn = connect(db_path)
+    matches = list(find_matches(conn, threshold))
+    with conn:
+        conn.execute("DELETE FROM matches")
+    written = upsert(conn, "matches", MATCH_COLUMNS, MATCH_KEY, matches)
+    conn.close()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Match lecture series to courses of the course catalogue.")
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="minimum title similarity of a match")
+    args = parser.parse_args()
+
+    matched = match_catalogue(args.db, args.threshold)
+    conn = connect(args.db)
+    total = conn.execute("SELECT COUNT(*) FROM lectures").fetchone()[0]
+    print(f"Matched {matched} of {total} lecture series to catalogue courses")
+    for year, courses, recorded, accessible in conn.execute(coverage_qry):
+        print(f"{year}: {recorded}/{courses} courses recorded, {accessible} accessible")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
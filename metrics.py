@@ -0,0 +1,177 @@
+"""
+This module records metrics of a scraping run: every HTTP request (latency, bytes received, status code, cache
+result, retries and crawl level) and the time spent in the fetch, parse and persist stages.
+At the end of a run they are exported as a JSON summary and as a Prometheus text file.
+"""
+
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from collections import defaultdict
+
+# upper bounds (seconds) of the request latency histogram
+LATENCY_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+def crawl_level(url):
+    """
+    Classifies a URL by the crawl level it belongs to.
+
+    Returns:
+        str: One of 'root', 'department', 'year', 'semester', 'lecture', 'json' or 'catalogue'.
+    """
+    if "vvz.ethz.ch" in url:
+        return "catalogue"
+    if url.endswith(".json"):
+        return "json"
+    if "/lectures/" not in url:
+        return "root"
+    depth = len(url.split("/lectures/", 1)[1].split("/"))
+    return ["department", "year", "semester", "lecture"][min(depth, 4) - 1]
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Metrics:
+    """Thread-safe collector of request and stage metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Discards everything recorded so far."""
+        with self._lock:
+            self.started = time.time()
+            self.requests = defaultdict(int)  # (level, status, cache) -> count
+            self.latencies = defaultdict(list)  # level -> latencies in seconds
+            self.bytes = defaultdict(int)  # level -> bytes received
+            self.retries = defaultdict(int)  # level -> retries
+            self.stages = defaultdict(lambda: [0.0, 0])  # stage -> [seconds, calls]
+
+    def record_request(self, url, latency, nbytes=0, status=None, cache="bypass", retries=0):
+        """
+        Records a single request.
+
+        Args:
+            url (str): The requested URL, used to determine the crawl level.
+            latency (float): Time until the response was received, in seconds.
+            nbytes (int): Size of the response body.
+            status (int, optional): HTTP status code, None if no response was received.
+            cache (str): 'hit', 'revalidated', 'miss' or 'bypass' (no cache configured).
+            retries (int): Number of retries before the final response.
+        """
+        level = crawl_level(url)
+        with self._lock:
+            self.requests[(level, str(status) if status else "error", cache)] += 1
+            self.latencies[level].append(latency)
+            self.bytes[level] += nbytes
+            self.retries[level] += retries
+
+    @contextmanager
+    def stage(self, name):
+        """Times the enclosed block as part of a stage ('fetch', 'parse' or 'persist')."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name][0] += elapsed
+                self.stages[name][1] += 1
+
+    def summary(self):
+        """Returns the recorded metrics aggregated per crawl level and stage."""
+        with self._lock:
+            levels = {}
+            for level, latencies in self.latencies.items():
+                counts = {key: count for key, count in self.requests.items() if key[0] == level}
+                levels[level] = {
+                    "requests": sum(counts.values()),
+                    "errors": sum(count for (_, status, _), count in counts.items()
+                                  if status == "error" or int(status) >= 400),
+                    "cache_hits": sum(count for (_, _, cache), count in counts.items()
+                                      if cache in ("hit", "revalidated")),
+                    "bytes": self.bytes[level],
+                    "retries": self.retries[level],
+                    "latency_mean": sum(latencies) / len(latencies),
+                    "latency_p50": _percentile(latencies, 0.5),
+                    "latency_p95": _percentile(latencies, 0.95),
+                    "latency_max": max(latencies),
+                    "status": {f"{status}/{cache}": count for (_, status, cache), count in counts.items()},
+                }
+            stages = {name: {"seconds": seconds, "calls": calls} for name, (seconds, calls) in self.stages.items()}
+        return {"started": self.started, "duration": time.time() - self.started, "levels": levels, "stages": stages}
+
+    def prometheus(self):
+        """Returns the recorded metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family("scraper_requests_total", "counter", "HTTP requests by crawl level, status and cache result.")
+            for (level, status, cache), count in sorted(self.requests.items()):
+                lines.append(f'scraper_requests_total{{level="{level}",status="{status}",cache="{cache}"}} {count}')
+
+            family("scraper_request_duration_seconds", "histogram", "Latency of HTTP requests by crawl level.")
+            for level, latencies in sorted(self.latencies.items()):
+                ordered = sorted(latencies)
+                for bound in LATENCY_BUCKETS:
+                    lines.append(f'scraper_request_duration_seconds_bucket{{level="{level}",le="{bound}"}} '
+                                 f'{bisect_left(ordered, bound + 1e-12)}')
+                lines.append(f'scraper_request_duration_seconds_bucket{{level="{level}",le="+Inf"}} {len(ordered)}')
+                lines.append(f'scraper_request_duration_seconds_sum{{level="{level}"}} {sum(ordered)}')
+                lines.append(f'scraper_request_duration_seconds_count{{level="{level}"}} {len(ordered)}')
+
+            family("scraper_response_bytes_total", "counter", "Bytes received by crawl level.")
+            for level, nbytes in sorted(self.bytes.items()):
+                lines.append(f'scraper_response_bytes_total{{level="{level}"}} {nbytes}')
+
+            family("scraper_retries_total", "counter", "Request retries by crawl level.")
+            for level, retries in sorted(self.retries.items()):
+                lines.append(f'scraper_retries_total{{level="{level}"}} {retries}')
+
+            family("scraper_stage_seconds_total", "counter", "Time spent per pipeline stage.")
+            for name, (seconds, _) in sorted(self.stages.items()):
+                lines.append(f'scraper_stage_seconds_total{{stage="{name}"}} {seconds}')
+
+            family("scraper_stage_calls_total", "counter", "Number of timed blocks per pipeline stage.")
+            for name, (_, calls) in sorted(self.stages.items()):
+                lines.append(f'scraper_stage_calls_total{{stage="{name}"}} {calls}')
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory="metrics", name="metrics"):
+        """
+        Writes the JSON summary and the Prometheus text file of the run.
+
+        Args:
+            directory (str): Output directory.
+            name (str): Base name of the files ('<name>.json' and '<name>.prom').
+
+        Returns:
+            tuple: The paths of the JSON summary and the Prometheus file.
+        """
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"{name}.json")
+        prom_path = os.path.join(directory, f"{name}.prom")
+        with open(json_path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        # write to a temporary file first so a node exporter never reads a partial file
+        with open(prom_path + ".tmp", "w") as f:
+            f.write(self.prometheus())
+        os.replace(prom_path + ".tmp", prom_path)
+        return json_path, prom_path
+
+
+# Metrics of the current run, shared by all scraper functions
+METRICS = Metrics()
@@ -0,0 +1,191 @@
+"""
+This module streams lecture metadata from 'video.ethz.ch' into the database.
+Link discovery, JSON fetching, metadata building and persisting run concurrently as stages with their own worker
+threads, connected by bounded queues: a stage that falls behind blocks the stages feeding it, so memory stays flat no
+matter how many series exist, and the first rows are written seconds after the crawl starts.
+
+    discover (pages -> lecture links) -> fetch (links -> JSON) -> build (JSON -> metadata) -> persist (batched upserts)
+"""
+
+import time
+import queue
+import threading
+
+import requests
+from tqdm import tqdm
+
+from frontier import LEVELS, ROOT_URL, in_scope
+from jsonparse import project_series
+from links import VisitedSet
+from metrics import METRICS
+from scraper import fetch, get_links, series_metadata_url, build_meta_data
+from storage import connect, upsert, DB_PATH, LECTURE_COLUMNS, LECTURE_KEY, LECTURE_HASH
+
+# closes a queue: every worker of the consuming stage stops once it sees it
+DONE = object()
+
+
+class Pipeline:
+    """
+    Crawls the lecture hierarchy and stores the metadata of every lecture series as it is discovered.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        discover_workers (int): Number of portal pages fetched in parallel.
+        fetch_workers (int): Number of series JSON documents fetched in parallel.
+        build_workers (int): Number of threads building metadata records from JSON.
+        queue_size (int): Capacity of each queue between two stages.
+        batch_size (int): Maximum number of records written per transaction.
+        flush_interval (float): Maximum number of seconds a record waits before being written.
+        departments (iterable, optional): Only crawl these departments, e.g. ['d-phys'].
+        years (iterable, optional): Only crawl these years.
+    """
+
+    def __init__(self, db_path=DB_PATH, discover_workers=8, fetch_workers=16, build_workers=2, queue_size=256,
+                 batch_size=500, flush_interval=2.0, departments=None, years=None):
+        self.db_path = db_path
+        self.workers = {"discover": discover_workers, "fetch": fetch_workers, "build": build_workers}
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.departments = departments
+        self.years = years
+        self.failed = []
+        self.visited = VisitedSet()
+        self._lock = threading.Lock()
+        self._pending_pages = 0
+
+    def _start(self, name, func, inbox, outbox):
+        """Starts the workers of a stage. The last worker to finish closes the stage's outbox."""
+        remaining = [self.workers[name]]
+
+        def work():
+            while True:
+                item = inbox.get()
+                if item is DONE:
+                    inbox.put(DONE)  # for the other workers of this stage
+                    break
+                try:
+                    result = func(item)
+                except Exception as e:
+                    url = item if isinstance(item, str) else item[0]
+                    print(f"Error in {name} stage for {url}: {e}")
+                    with self._lock:
+                        self.failed.append(url)
+                    continue
+                if result is not None:
+                    outbox.put(result)
+            with self._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                outbox.put(DONE)
+
+        for _ in range(remaining[0]):
+            threading.Thread(target=work, name=f"{name}-worker", daemon=True).start()
+
+    def _discover(self, pages, links):
+        """Returns the stage function visiting one (url, level) page, queueing its subpages and lecture links."""
+        def visit(page):
+            url, level = page
+            try:
+                children = get_links(url, level)
+                if children is None:
+                    raise requests.RequestException("no response")
+                child_level = LEVELS[level]
+                # drop links seen before anywhere in the crawl, before they are requested
+                children = self.visited.filter(
+                    child for child in children if in_scope(child, self.departments, self.years))
+                if child_level == "lecture":
+                    for child in children:
+                        links.put(child)  # blocks while the downstream stages are busy
+                else:
+                    with self._lock:
+                        self._pending_pages += len(children)
+                    for child in children:
+                        pages.put((child, child_level))
+            finally:
+                with self._lock:
+                    self._pending_pages -= 1
+                    finished = self._pending_pages == 0
+                if finished:
+                    pages.put(DONE)
+        return visit
+
+    @staticmethod
+    def _fetch(lecture_url):
+        return lecture_url, fetch(series_metadata_url(lecture_url))
+
+    @staticmethod
+    def _build(fetched):
+        lecture_url, content = fetched
+        with METRICS.stage("parse"):
+            return build_meta_data(lecture_url, project_series(content))
+
+    def _write(self, conn, batch):
+        return upsert(conn, "lectures", LECTURE_COLUMNS, LECTURE_KEY, batch, self.batch_size, LECTURE_HASH)
+
+    def _persist(self, records, progress):
+        """Writes records in batches until the queue is closed; returns the number written and the first write time."""
+        conn = connect(self.db_path)
+        batch = []
+        written, first_write = 0, None
+        last_flush = time.monotonic()
+        while True:
+            try:
+                record = records.get(timeout=self.flush_interval)
+            except queue.Empty:
+                record = None
+            if record is DONE:
+                break
+            if record is not None:
+                batch.append(record)
+            if len(batch) >= self.batch_size or (batch and time.monotonic() - last_flush >= self.flush_interval):
+                written += self._write(conn, batch)
+                first_write = first_write or time.monotonic()
+                progress.update(len(batch))
+                batch = []
+                last_flush = time.monotonic()
+        if batch:
+            written += self._write(conn, batch)
+            first_write = first_write or time.monotonic()
+            progress.update(len(batch))
+        conn.close()
+        return written, first_write
+
+    def run(self, root_url=ROOT_URL):
+        """
+        Runs all stages until every discovered lecture series has been stored.
+
+        Args:
+            root_url (str): The main site the crawl starts from.
+
+        Returns:
+            dict: The number of series stored, the URLs that failed, the seconds until the first row was written
+                and the total seconds.
+        """
+        start = time.monotonic()
+        pages = queue.Queue()  # unbounded: pages above the lecture level are few and feed back into the stage
+        links = queue.Queue(self.queue_size)
+        contents = queue.Queue(self.queue_size)
+        records = queue.Queue(self.queue_size)
+
+        self._pending_pages = 1
+        self.visited = VisitedSet()
+        self.visited.add(root_url)
+        pages.put((root_url, "root"))
+        self._start("discover", self._discover(pages, links), pages, links)
+        self._start("fetch", self._fetch, links, contents)
+        self._start("build", self._build, contents, records)
+
+        with tqdm(desc="Storing metadata", unit="series") as progress:
+            stored, first_write = self._persist(records, progress)
+
+        elapsed = time.monotonic() - start
+        print(f"Stored {stored} lecture series in {elapsed:.1f}s, {len(self.failed)} failed")
+        return {
+            "stored": stored,
+            "failed": list(self.failed),
+            "first_row": first_write - start if first_write else None,
+            "elapsed": elapsed,
+        }
@@ -0,0 +1,152 @@
+"""
+This module provides the politeness scheduler shared by all scraper functions.
+Each host gets a token bucket limiting the request rate and a concurrency limit. Both adapt to the origin: they grow
+additively while responses arrive within a latency target and shrink multiplicatively when responses get slow or the
+origin answers 429/503, in which case its Retry-After header is honoured before the next request. All requests in
+flight when a host slows down report it, so rate and concurrency shrink at most once per latency target.
+"""
+
+import time
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# statuses telling us to back off
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """
+    Parses a Retry-After header.
+
+    Args:
+        value (str): Either a number of seconds or an HTTP date.
+
+    Returns:
+        float: The number of seconds to wait, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostLimiter:
+    """
+    Token bucket and AIMD concurrency controller of a single host.
+
+    Args:
+        rate (float): Initial request rate in requests per second.
+        burst (float): Capacity of the token bucket.
+        concurrency (float): Initial number of concurrent requests.
+        max_rate (float): Upper bound of the request rate.
+        max_concurrency (int): Upper bound of the number of concurrent requests.
+        latency_target (float): Response time in seconds above which the host is considered overloaded. The default
+            leaves room for large pages such as the course catalogue's.
+        backoff (float): Factor applied to rate and concurrency on overload (multiplicative decrease).
+    """
+
+    def __init__(self, rate=10.0, burst=10.0, concurrency=4.0, max_rate=100.0, max_concurrency=32,
+                 latency_target=3.0, backoff=0.5):
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.backoff = backoff
+
+        self.tokens = burst
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._last_backoff = float("-inf")
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Blocks until the host may receive another request."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.in_flight >= max(1, int(self.concurrency)):
+                    wait = None  # until a request finishes
+                elif self.tokens < 1:
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+                self._cond.wait(wait)
+
+    def release(self, latency, status=None, retry_after=None):
+        """
+        Reports the outcome of a request and adapts rate and concurrency.
+
+        Args:
+            latency (float): Response time in seconds.
+            status (int, optional): HTTP status code, None if the request failed without a response.
+            retry_after (float, optional): Seconds the origin asked us to wait.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if status is None or status in THROTTLE_STATUSES or latency > self.latency_target:
+                # one decrease per window: the other slow responses of this window report the same overload
+                if now - self._last_backoff >= self.latency_target:
+                    self.rate = max(0.1, self.rate * self.backoff)
+                    self.concurrency = max(1.0, self.concurrency * self.backoff)
+                    self._last_backoff = now
+            else:
+                self.rate = min(self.max_rate, self.rate + 1.0 / self.concurrency)
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+            self._cond.notify_all()
+
+
+class Scheduler:
+    """
+    Hands out per-host request slots, creating a `HostLimiter` for every new host.
+
+    Args:
+        **limits: Keyword arguments of `HostLimiter`, applied to every host.
+    """
+
+    def __init__(self, **limits):
+        self.limits = limits
+        self.hosts = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, url):
+        """Returns the limiter of the host of a URL."""
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostLimiter(**self.limits)
+            return self.hosts[host]
+
+    def acquire(self, url):
+        """Blocks until a request to the host of the URL may be made."""
+        self.limiter(url).acquire()
+
+    def release(self, url, latency, status=None, retry_after=None):
+        """Reports the outcome of a request, see `HostLimiter.release`."""
+        self.limiter(url).release(latency, status, retry_after)
+
+
+# Scheduler shared by all scraper functions
+SCHEDULER = Scheduler()
@@ -4,19 +4,125 @@ It retrieves lecture video links along with related metadata such as title, desc
 """
 
 import re
+import time
+import multiprocessing
 from tqdm import tqdm
-import json
 import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 
-# Define session to handle cookies and authentication
-SESSION = requests.Session()
+from cache import HTTPCache
+from transport import RequestsTransport
+from links import extract_hrefs, canonical_url, VisitedSet
+from jsonparse import loads, project_series
+from catalogue import COURSE_NUMBER, iter_catalogue_entries
+from metrics import METRICS
+import ratelimit
+from ratelimit import THROTTLE_STATUSES, parse_retry_after
+
+# Thread-safe pooled HTTP transport shared by all scraper functions, see transport.py
+TRANSPORT = RequestsTransport()
+
+# Persistent response cache, set to None to always download pages
+CACHE = HTTPCache()
+
+# Politeness scheduler limiting the request rate per host, set to None to disable throttling
+SCHEDULER = ratelimit.SCHEDULER
+
+# Number of times a request is retried when the origin answers 429/503
+MAX_RETRIES = 3
+
+# Matches the results page of a course catalogue URL
+PAGE_PATTERN = re.compile(r"[?&]seite=(\d+)")
+
+# Backend used to extract links from the portal pages, see links.py
+LINK_BACKEND = "scanner"
+
+# Process pool running the CPU-bound parsers, see `start_parser_pool`; None parses in the fetching thread
+PARSER_POOL = None
+
+
+def fetch(url):
+    """
+    Fetches the raw body of a URL, serving it from the response cache when possible.
+
+    Fresh cache entries are returned without contacting the server; stale ones are revalidated with
+    If-None-Match / If-Modified-Since so unchanged pages are not downloaded again.
+
+    Args:
+        url (str): The URL to fetch.
+
+    Returns:
+        bytes: The response body.
+
+    Raises:
+        requests.RequestException: If the request fails.
+    """
+    start = time.perf_counter()
+    status, cache, received, retries = None, "bypass" if CACHE is None else "miss", 0, 0
+    try:
+        with METRICS.stage("fetch"):
+            cached = CACHE.lookup(url) if CACHE else None
+            if cached and cached.fresh:
+                status, cache = 200, "hit"
+                return cached.body
+
+            headers = cached.conditional_headers() if cached else None
+            response, retries = send(url, headers)
+            status, received = response.status_code, len(response.content)
+            if cached and response.status_code == 304:
+                cache = "revalidated"
+                CACHE.revalidated(url)
+                return cached.body
+
+            response.raise_for_status()  # Raises a HTTPError for bad responses
+            if CACHE:
+                CACHE.store(url, response.content, response.headers.get("ETag"),
+                            response.headers.get("Last-Modified"))
+            return response.content
+    finally:
+        METRICS.record_request(url, time.perf_counter() - start, received, status, cache, retries)
+
+
+def send(url, headers):
+    """
+    Sends a GET request through the politeness scheduler, retrying requests the origin throttled (429/503) up to
+    `MAX_RETRIES` times. The scheduler delays retries according to the Retry-After header and its reduced rate.
+
+    Args:
+        url (str): The URL to request.
+        headers (dict, optional): Additional request headers.
+
+    Returns:
+        tuple: The final response and the number of retries.
+
+    Raises:
+        requests.RequestException: If no response was received.
+    """
+    retries = 0
+    while True:
+        response = None
+        if SCHEDULER:
+            SCHEDULER.acquire(url)
+        start = time.perf_counter()
+        try:
+            response = TRANSPORT.get(url, headers=headers)
+        finally:
+            if SCHEDULER:
+                SCHEDULER.release(url, time.perf_counter() - start,
+                                  response.status_code if response is not None else None,
+                                  parse_retry_after(response.headers.get("Retry-After")) if response is not None else None)
+
+        if response.status_code not in THROTTLE_STATUSES or retries >= MAX_RETRIES:
+            return response, retries
+        retries += 1
+        if not SCHEDULER:
+            time.sleep(2 ** retries)
 
 
 def get_html(url):
     """
-    Fetches the HTML content for a given URL using a predefined session with specific headers to mimic a browser.
+    Fetches the HTML content for a given URL using the shared transport, which sends headers to mimic a browser.
 
     Args:
         url (str): The URL from which to fetch the HTML.
@@ -24,20 +130,63 @@ def get_html(url):
     Returns:
         BeautifulSoup: An object containing the parsed HTML content, or None if an error occurs.
     """
-    # Define headers to mimic a legitimate browser requestpyth
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.71 Safari/537.36",
-        "Referer": "https://example.com/",
-    }
-
     try:
-        response = SESSION.get(url, headers=headers)
-        response.raise_for_status()  # Raises a HTTPError for bad responses
-        return BeautifulSoup(response.content, "html.parser")
+        content = fetch(url)
     except requests.RequestException as e:
         print(f"Error fetching {url}: {e}")
         return None
 
+    # imported here, the crawl and catalogue paths do not build soups
+    from bs4 import BeautifulSoup
+
+    with METRICS.stage("parse"):
+        return BeautifulSoup(content, "html.parser")
+
+
+def start_parser_pool(processes=None):
+    """
+    Starts a process pool for the parsers, so fetching threads hand raw pages to it instead of parsing under the GIL.
+    The pool starts its worker processes lazily, on the first page submitted from a fetching thread. They are started
+    through a fork server (or spawned where forking is unavailable) rather than forked from this multithreaded process,
+    whose locks other threads may hold at that moment.
+
+    Args:
+        processes (int, optional): Number of parser processes, defaults to the number of CPUs.
+
+    Returns:
+        ProcessPoolExecutor: The pool.
+    """
+    global PARSER_POOL
+    stop_parser_pool()
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    PARSER_POOL = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(method))
+    return PARSER_POOL
+
+
+def stop_parser_pool():
+    """Shuts the parser pool down; parsers run in the fetching thread again."""
+    global PARSER_POOL
+    if PARSER_POOL is not None:
+        PARSER_POOL.shutdown()
+        PARSER_POOL = None
+
+
+def run_parser(parser, *args):
+    """
+    Runs a parser on the raw content of a page, in the parser pool if one is started.
+
+    Args:
+        parser (callable): A module-level function taking raw bytes and returning a compact (picklable) result.
+        *args: The arguments of the parser.
+
+    Returns:
+        The result of the parser.
+    """
+    with METRICS.stage("parse"):
+        if PARSER_POOL is None:
+            return parser(*args)
+        return PARSER_POOL.submit(parser, *args).result()
+
 
 def get_department_links(url):
     """
@@ -49,17 +198,25 @@ def get_department_links(url):
     Returns:
         list: A list of URLs for department-specific lecture sections.
     """
-    soup = get_html(url)
+    return get_links(url, "root") or []
+
+
+def parse_department_links(hrefs, url):
+    """
+    Filters the department-specific lecture links out of the links of the main site.
 
-    soup = get_html(url)
-    if not soup:  # Check if the HTML was not fetched successfully
-        return []
+    Args:
+        hrefs (list): The hrefs of all anchors on the main site.
+        url (str): The URL the HTML was fetched from, used to resolve relative links.
 
+    Returns:
+        list: A list of URLs for department-specific lecture sections.
+    """
     links = []
-    for link in soup.find_all("a", href=True):
-        full_url = urljoin(url, link["href"])
+    for href in hrefs:
+        full_url = canonical_url(urljoin(url, href))
         # Improve filtering: Ensure only valid department links are considered
-        if "lectures/" in link["href"] and full_url.startswith("https://"):
+        if "lectures/" in href and full_url.startswith("https://"):
             links.append(full_url)
 
     return list(set(links))  # set-list conversion to avoid duplicates
@@ -75,18 +232,27 @@ def get_years(department_url):
     Returns:
         list: A list of URLs for different academic years.
     """
-    department = (department_url.split("/")[4]).split(".")[0]
-    year_links = []
+    return get_links(department_url, "department") or []
 
-    soup = get_html(department_url)
-    links = soup.find_all("a")
 
-    for link in links:
-        link = link["href"]
+def parse_years(hrefs, department_url):
+    """
+    Filters the academic year links out of the links of a department page.
 
+    Args:
+        hrefs (list): The hrefs of all anchors on the department page.
+        department_url (str): The URL of the department.
+
+    Returns:
+        list: A list of URLs for different academic years.
+    """
+    department = (department_url.split("/")[4]).split(".")[0]
+    year_links = []
+
+    for link in hrefs:
         # very hackish criterion but it works...
         if f"/lectures/{department}/" in link and ".html" in link and len(link.split("/")) == 4:
-            year_link = urljoin(department_url, link)
+            year_link = canonical_url(urljoin(department_url, link))
             year_links.append(year_link)
 
     return list(set(year_links))
@@ -102,20 +268,30 @@ def get_semester(year_link):
     Returns:
         list: A list of URLs for the 'spring' and 'autumn' semesters.
     """
-    soup = get_html(year_link)
-    if not soup:
-        return []
+    return get_links(year_link, "year") or []
 
+
+def parse_semester(hrefs, year_link):
+    """
+    Filters the semester links out of the links of a year page.
+
+    Args:
+        hrefs (list): The hrefs of all anchors on the year page.
+        year_link (str): The URL of the academic year.
+
+    Returns:
+        list: A list of URLs for the 'spring' and 'autumn' semesters.
+    """
     semester_links = []
     max_links = 2  # because there are only two semesters each year :)
 
-    for link in soup.find_all("a", href=True):
-        if "spring.html" in link["href"]:
+    for href in hrefs:
+        if "spring.html" in href:
             semester_links.append(
-                urljoin(year_link.replace(".html", "") + "/", "spring.html"))
-        elif "autumn.html" in link["href"]:
+                canonical_url(urljoin(year_link.replace(".html", "") + "/", "spring.html")))
+        elif "autumn.html" in href:
             semester_links.append(
-                urljoin(year_link.replace(".html", "")+"/", "autumn.html"))
+                canonical_url(urljoin(year_link.replace(".html", "")+"/", "autumn.html")))
         if max_links and len(semester_links) >= max_links:
             break
 
@@ -132,43 +308,103 @@ def get_lectures(url):
     Returns:
         list: Links to individual lecture videos.
     """
-    soup = get_html(url)
-    if not soup:
-        return []
+    return get_links(url, "semester") or []
+
+
+def parse_lectures(hrefs, url):
+    """
+    Filters the lecture video links out of the links of a semester page.
+
+    Args:
+        hrefs (list): The hrefs of all anchors on the semester page.
+        url (str): The URL of the semester page.
 
+    Returns:
+        list: Links to individual lecture videos.
+    """
     department = (url.split("/")[4]).split(".")[0]
     lecture_links = []
-    for link in soup.find_all("a"):
-        link = link["href"]
+    for link in hrefs:
         if len(link.split("/")) == 6 and department in link:
-            link = urljoin(url+"/", link)
+            link = canonical_url(urljoin(url+"/", link))
             lecture_links.append(link)
 
     return list(set(lecture_links))
 
 
-def retrieve_lecture_links_department(department_site):
+# level of a portal page -> filter selecting the links to its child pages
+LINK_FILTERS = {
+    "root": parse_department_links,
+    "department": parse_years,
+    "year": parse_semester,
+    "semester": parse_lectures,
+}
+
+
+def parse_links(content, level, url, backend=None):
     """
-    Retrieves all available lecture links from the main site 'https://video.ethz.ch'.
+    Extracts the links to the child pages of a portal page from its raw HTML. Runs in the parser pool.
+
+    Args:
+        content (bytes): The raw HTML.
+        level (str): The level of the page, see `LINK_FILTERS`.
+        url (str): The URL of the page.
+        backend (str, optional): The link extraction backend, see `links.extract_hrefs`. Defaults to `LINK_BACKEND`;
+            parser processes do not see changes to it made in the main process, so callers pass it explicitly.
+
+    Returns:
+        list: The links to the child pages.
+    """
+    return LINK_FILTERS[level](extract_hrefs(content, backend or LINK_BACKEND), url)
+
+
+def get_links(url, level):
+    """
+    Fetches a portal page and returns the links to its child pages.
+
+    Args:
+        url (str): The URL of the page.
+        level (str): The level of the page, see `LINK_FILTERS`.
+
+    Returns:
+        list: The links to the child pages, or None if an error occurs.
+    """
+    try:
+        content = fetch(url)
+    except requests.RequestException as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+
+    return run_parser(parse_links, content, level, url, LINK_BACKEND)
+
+
+def retrieve_lecture_links_department(department_site, visited=None):
+    """
+    Retrieves all available lecture links of a department.
+
+    Args:
+        department_site (str): The URL of the department.
+        visited (VisitedSet, optional): URLs already scheduled by the crawl; pages in it are not fetched again.
 
     Returns:
         list: All unique lecture links found on the site.
     """
     print(f"Starting link retrieval for {department_site}")
+    visited = visited if visited is not None else VisitedSet()
+    visited.add(department_site)
 
     links = []
-    years = get_years(department_site)
+    years = visited.filter(get_years(department_site))
 
     for year in years:
-        semesters = get_semester(year)
+        semesters = visited.filter(get_semester(year))
         for semester in semesters:
-            lectures = get_lectures(semester)
+            lectures = visited.filter(get_lectures(semester))
             links.extend(lectures)
 
-    unique_links = list(set(links))
     print(
-        f"Completed link retrieval for {department_site}, found {len(unique_links)} links")
-    return unique_links
+        f"Completed link retrieval for {department_site}, found {len(links)} links")
+    return links
 
 
 def retrieve_lecture_links():
@@ -181,19 +417,27 @@ def retrieve_lecture_links():
     url = "https://video.ethz.ch/"
     links = []
 
-    departments = get_department_links(url)
+    # every page is fetched once, however often and in whichever variant it is linked
+    visited = VisitedSet()
+    visited.add(url)
+
+    departments = visited.filter(get_department_links(url))
     for department in departments:
         print("Scraping lectures links from: ", department)
-        years = get_years(department)
+        years = visited.filter(get_years(department))
         for year in years:
-            semesters = get_semester(year)
+            semesters = visited.filter(get_semester(year))
 
             for semester in semesters:
-                lectures = get_lectures(semester)
+                lectures = visited.filter(get_lectures(semester))
                 links.extend(lectures)
-    unique_links = list(set(links))
-    print(f"Total unique lecture links retrieved: {len(unique_links)}")
-    return unique_links
+    print(f"Total unique lecture links retrieved: {len(links)}")
+    return links
+
+
+def series_metadata_url(lecture_url):
+    """Returns the URL of the series metadata JSON belonging to a lecture page."""
+    return lecture_url.replace(".html", "") + ".series-metadata.json"
 
 
 def get_json(lecture_url):
@@ -206,9 +450,24 @@ def get_json(lecture_url):
     Returns:
     dict: JSON data extracted from the metadata link.
     """
-    json_url = lecture_url.replace(".html", "") + ".series-metadata.json"
-    json_data = json.loads(get_html(json_url).text)
-    return json_data
+    content = fetch(series_metadata_url(lecture_url))
+    with METRICS.stage("parse"):
+        return loads(content)
+
+
+def get_series(lecture_url):
+    """
+    Retrieves only the fields of a lecture's JSON metadata that are needed for its metadata record.
+
+    Args:
+    lecture_url (str): URL of the lecture page.
+
+    Returns:
+    dict: The projected metadata, see `jsonparse.project_series`.
+    """
+    content = fetch(series_metadata_url(lecture_url))
+    with METRICS.stage("parse"):
+        return project_series(content)
 
 
 def check_access(json_data):
@@ -236,34 +495,48 @@ def retrieve_meta_data(lecture_url):
     Returns:
     dict: A dictionary containing structured metadata of the lecture.
     """
-    meta = dict()
+    return build_meta_data(lecture_url, get_series(lecture_url))
+
+
+def build_meta_data(lecture_url, series):
+    """
+    Builds the metadata record of a lecture from its URL and its projected series metadata.
+
+    Args:
+    lecture_url (str): URL of the lecture.
+    series (dict): The projected series metadata, see `get_series`.
 
-    json_data = get_json(lecture_url)
+    Returns:
+    dict: A dictionary containing structured metadata of the lecture.
+    """
     url_data = lecture_url.split("/")
 
     meta = {
-        "title": json_data.get('title'),
-        "description": json_data.get("description"),
+        "title": series["title"],
+        "description": series["description"],
         "department": url_data[4],
         "year": url_data[5],
-        "no_lectures": len(json_data.get("episodes")),
-        "lecturer": ", ".join(json_data.get("selectedEpisode")["createdBy"]),
+        "semester": url_data[6],
+        "no_lectures": series["no_episodes"],
+        "lecturer": ", ".join(series["createdBy"]),
         "url": lecture_url,
-        "access": check_access(json_data)
+        "access": check_access(series)
     }
 
     return meta
 
 
-def extract_catalgogue_data(html, year):
+def extract_catalgogue_data(html, year, semester=None):
     """
     Extracts and organizes course catalogue data from an HTML page into a structured list of dictionaries. 
 
     Only courses characterized as "V" (indicating a lecture) in the 'lecture/recitation' field are included.
+    `catalogue.iter_catalogue_entries` is a streaming equivalent working on the raw page.
 
     Args:
         html (BeautifulSoup): The parsed HTML from the course catalogue page.
         year (int): The year for which the catalogue data is being extracted.
+        semester (str, optional): The semester ('W' or 'S') for which the catalogue data is being extracted.
 
     Returns:
         list: A list of dictionaries, each containing course details such as course number, title, credits, and lecture type.
@@ -277,13 +550,16 @@ def extract_catalgogue_data(html, year):
     for row in table.find_all('tr'):
         # Extract text from each cell in the row
         columns = [col.text.strip() for col in row.find_all(['td', 'th'])]
+        if len(columns) < 5:
+            continue
 
         # Validate the course number format and ensure it's a lecture
-        if re.match(r'\d{3}-\d{4}-\d{2}L', columns[0]) and "V" in entry["lecture/recitation"]:
+        if COURSE_NUMBER.match(columns[0]) and "V" in columns[4]:
             entry = {
                 "number": columns[0],
                 "title": columns[1],
                 "year": str(year),
+                "semester": semester,
                 "credits": columns[3],
                 "lecture/recitation": columns[4]
             }
@@ -292,21 +568,143 @@ def extract_catalgogue_data(html, year):
     return lectures
 
 
-def get_course_catalogue_data():
+def catalogue_url(semkez, page=0):
+    """
+    Builds the URL of a results page of the course catalogue.
+
+    Args:
+        semkez (str): The semester key, e.g. '2022W'.
+        page (int): The results page ('seite').
+
+    Returns:
+        str: The URL of the results page.
+    """
+    return f"https://www.vvz.ethz.ch/Vorlesungsverzeichnis/sucheLehrangebot.view?lerneinheitscode=&deptId=&famname=&unterbereichAbschnittId=&seite={page}&lerneinheitstitel=&rufname=&kpRange=0,999&lehrsprache=&bereichAbschnittId=&semkez={semkez}&studiengangAbschnittId=&studiengangTyp=&ansicht=1&lang=de&katalogdaten=&wahlinfo="
+
+
+def catalogue_page_count(hrefs):
+    """
+    Determines the last results page from the pagination links of a catalogue page.
+
+    Args:
+        hrefs (list): The hrefs of all anchors on a results page.
+
+    Returns:
+        int: The highest 'seite' linked from the page, 0 if the results are not paginated.
+    """
+    pages = [int(match.group(1)) for match in map(PAGE_PATTERN.search, hrefs) if match]
+    return max(pages, default=0)
+
+
+def get_catalogue_page(semkez, page, year):
+    """
+    Fetches a results page of the course catalogue and extracts its courses and pagination.
+
+    Args:
+        semkez (str): The semester key, e.g. '2022W'.
+        page (int): The results page ('seite').
+        year (int): The year the semester belongs to.
+
+    Returns:
+        tuple: The list of course entries and the last results page of the semester, or ([], 0) if an error occurs.
+    """
+    url = catalogue_url(semkez, page)
+    try:
+        content = fetch(url)
+    except requests.RequestException as e:
+        print(f"Error fetching {url}: {e}")
+        return [], 0
+
+    return run_parser(parse_catalogue_page, content, year, semkez[-1])
+
+
+def parse_catalogue_page(content, year, semester):
+    """
+    Extracts the courses and the pagination of a raw course catalogue page. Runs in the parser pool.
+
+    Returns:
+        tuple: The list of course entries and the last results page of the semester.
+    """
+    return list(iter_catalogue_entries(content, year, semester)), catalogue_page_count(extract_hrefs(content))
+
+
+def get_course_catalogue_data(first_year=2006, last_year=2023, workers=8):
     """
     Retrieves course catalogue data across multiple years and semesters from a specified URL, filtering and deduplicating the data.
 
+    The first results page of every semester is fetched to discover how many pages it has, then all remaining pages
+    of all semesters are fetched concurrently. Pagination bars may only show a window of pages, so every page's
+    pagination is read again and pages beyond the last one scheduled are added as they are discovered.
+
+    Args:
+        first_year (int): The first year to retrieve.
+        last_year (int): The last year to retrieve (inclusive).
+        workers (int): Maximum number of requests in flight.
+
     Returns:
         list: A unique list of course entries from the catalogue data.
     """
     catalogue_data = []
+    semesters = [(str(year) + semester, year) for year in range(first_year, last_year + 1) for semester in ["W", "S"]]
+    scheduled = {semkez: 0 for semkez, _ in semesters}  # semester -> last results page scheduled
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, \
+            tqdm(total=len(semesters), desc="Retrieving catalogue", unit="page") as progress:
+        pending = {executor.submit(get_catalogue_page, semkez, 0, year): (semkez, year) for semkez, year in semesters}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                semkez, year = pending.pop(future)
+                data, last_page = future.result()
+                catalogue_data.extend(data)
+                progress.update()
+                if last_page > scheduled[semkez]:
+                    for page in range(scheduled[semkez] + 1, last_page + 1):
+                        pending[executor.submit(get_catalogue_page, semkez, page, year)] = (semkez, year)
+                    progress.total += last_page - scheduled[semkez]
+                    progress.refresh()
+                    scheduled[semkez] = last_page
+
+    return dedupe_catalogue(catalogue_data)
+
+
+def catalogue_key(entry):
+    """Returns the key identifying a course in the catalogue: its number, year and semester."""
+    return entry["number"], entry["year"], entry.get("semester")
+
+
+def merge_catalogue_entries(entry, duplicate):
+    """
+    Merges two catalogue entries with the same key: fields missing or empty in the first entry are taken from the
+    duplicate, all other fields are kept.
+
+    Args:
+        entry (dict): The entry seen first.
+        duplicate (dict): The entry seen later.
+
+    Returns:
+        dict: The merged entry.
+    """
+    merged = dict(entry)
+    for field, value in duplicate.items():
+        if merged.get(field) in (None, "") and value not in (None, ""):
+            merged[field] = value
+    return merged
 
-    for year in tqdm(range(2006, 2024)):
-        for semester in ["W", "S"]:
-            semester = str(year) + semester
-            url = f"https://www.vvz.ethz.ch/Vorlesungsverzeichnis/sucheLehrangebot.view?lerneinheitscode=&deptId=&famname=&unterbereichAbschnittId=&seite=0&lerneinheitstitel=&rufname=&kpRange=0,999&lehrsprache=&bereichAbschnittId=&semkez={semester}&studiengangAbschnittId=&studiengangTyp=&ansicht=1&lang=de&katalogdaten=&wahlinfo="
-            html = get_html(url)
-            data = extract_catalgogue_data(html, year)
-            catalogue_data.extend(data)
 
-    return [i for n, i in enumerate(catalogue_data) if i not in catalogue_data[n + 1:]]
+def dedupe_catalogue(entries, merge=merge_catalogue_entries):
+    """
+    Removes duplicate catalogue entries in linear time, keyed by `catalogue_key`.
+
+    Args:
+        entries (iterable): Catalogue entries as returned by `extract_catalgogue_data`.
+        merge (callable): Called as `merge(entry, duplicate)` to resolve entries with the same key.
+
+    Returns:
+        list: One entry per key, in order of first occurrence.
+    """
+    unique = {}
+    for entry in entries:
+        key = catalogue_key(entry)
+        unique[key] = merge(unique[key], entry) if key in unique else entry
+    return list(unique.values())
@@ -0,0 +1,136 @@
+"""
+This module searches the lecture database through its FTS5 full-text indexes (see storage.py): lecture series by
+title, description and lecturer, catalogue courses by title. Results are ranked by BM25.
+
+Usage:
+    python search.py "quantum mechanics" [--catalogue] [--year 2020] [--department d-phys] [--limit 20]
+"""
+
+import re
+import argparse
+
+from storage import connect, DB_PATH
+
+LIMIT = 20
+
+# BM25 weights of the indexed columns: a hit in the title counts more than one in the description
+LECTURE_WEIGHTS = {"title": 10.0, "description": 1.0, "lecturer": 5.0}
+
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def match_expression(query, prefix=True):
+    """
+    Turns free text into an FTS5 query matching all of its words.
+
+    Words are quoted, so characters with a meaning in the FTS5 query syntax (such as '-' or ':') are searched for
+    literally.
+
+    Args:
+        query (str): The text to search for.
+        prefix (bool): Whether the last word also matches longer words, as while typing.
+
+    Returns:
+        str: The FTS5 query, or None if the text contains no words.
+    """
+    terms = [f'"{term}"' for term in TERM_PATTERN.findall(query)]
+    if not terms:
+        return None
+    if prefix:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _filters(year, department, columns):
+    clauses, params = [], []
+    if year is not None:
+        clauses.append("t.year = ?")
+        params.append(str(year))
+    if department is not None and "department" in columns:
+        clauses.append("t.department = ?")
+        params.append(department.lower())
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+
+def search_lectures(conn, query, year=None, department=None, limit=LIMIT, raw=False):
+    """
+    Searches lecture series by title, description and lecturer.
+
+    Args:
+        conn (sqlite3.Connection): An open connection, see `storage.connect`.
+        query (str): Free text, or an FTS5 query if `raw` is set.
+        year (int, optional): Only return series of this year.
+        department (str, optional): Only return series of this department, e.g. 'd-phys'.
+        limit (int): Maximum number of results.
+        raw (bool): Whether `query` is passed to FTS5 unchanged.
+
+    Returns:
+        list: Dictionaries with url, title, lecturer, department, year, semester and rank (lower is better).
+    """
+    expression = query if raw else match_expression(query)
+    if not expression:
+        return []
+    columns = ["url", "title", "lecturer", "department", "year", "semester"]
+    where, params = _filters(year, department, columns)
+    weights = ", ".join(map(str, LECTURE_WEIGHTS.values()))
+    rows = conn.execute(f'''
+        SELECT {", ".join("t." + column for column in columns)}, bm25(lecture_search, {weights}) AS rank
+        FROM lecture_search JOIN lectures t ON t.rowid = lecture_search.rowid
+        WHERE lecture_search MATCH ?{where}
+        ORDER BY rank LIMIT ?
+    ''', [expression] + params + [limit])
+    return [dict(zip(columns + ["rank"], row)) for row in rows]
+
+
+def search_catalogue(conn, query, year=None, limit=LIMIT, raw=False):
+    """
+    Searches catalogue courses by title.
+
+    Args:
+        conn (sqlite3.Connection): An open connection, see `storage.connect`.
+        query (str): Free text, or an FTS5 query if `raw` is set.
+        year (int, optional): Only return courses of this year.
+        limit (int): Maximum number of results.
+        raw (bool): Whether `query` is passed to FTS5 unchanged.
+
+    Returns:
+        list: Dictionaries with number, title, year, semester and rank (lower is better).
+    """
+    expression = query if raw else match_expression(query)
+    if not expression:
+        return []
+    columns = ["number", "title", "year", "semester"]
+    where, params = _filters(year, None, columns)
+    rows = conn.execute(f'''
+        SELECT {", ".join("t." + column for column in columns)}, bm25(catalogue_search) AS rank
+        FROM catalogue_search JOIN catalogue t ON t.rowid = catalogue_search.rowid
+        WHERE catalogue_search MATCH ?{where}
+        ORDER BY rank LIMIT ?
+    ''', [expression] + params + [limit])
+    return [dict(zip(columns + ["rank"], row)) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search over lecture series and catalogue courses.")
+    parser.add_argument("query", help="words to search for")
+    parser.add_argument("--catalogue", action="store_true", help="search catalogue courses instead of series")
+    parser.add_argument("--year", type=int, help="only return results of this year")
+    parser.add_argument("--department", help="only return series of this department, e.g. d-phys")
+    parser.add_argument("--limit", type=int, default=LIMIT, help="maximum number of results")
+    parser.add_argument("--raw", action="store_true", help="pass the query to FTS5 unchanged")
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.catalogue:
+        for result in search_catalogue(conn, args.query, args.year, args.limit, args.raw):
+            print(f"{result['number']}  {result['year']}{result['semester']}  {result['title']}")
+    else:
+        for result in search_lectures(conn, args.query, args.year, args.department, args.limit, args.raw):
+            print(f"{result['department']}  {result['year']} {result['semester']}  {result['title']}"
+                  f"  ({result['lecturer']})  {result['url']}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
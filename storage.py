@@ -0,0 +1,449 @@
+"""
+This module persists scraped data in the SQLite database 'lecture_data.db'.
+Tables have an explicit schema with keys and indexes, and records are upserted from any iterator in large batched
+transactions, so writes are incremental and never need the whole dataset in memory. The database runs in WAL mode,
+which lets readers such as visuals.py query it while a crawl is writing.
+
+Per department, year and semester counts used for reporting are kept in summary tables that triggers update on every
+write, so reports read a few dozen pre-aggregated rows instead of scanning the raw tables. Triggers likewise keep the
+FTS5 full-text indexes over lecture and catalogue texts in sync (see search.py).
+
+Lectures carry a hash of their metadata: upserts skip rows whose hash is unchanged, and every change adds a version
+with valid_from/valid_to timestamps to `lecture_history` (see history.py).
+"""
+
+import json
+import sqlite3
+import hashlib
+from itertools import islice
+
+from metrics import METRICS
+
+DB_PATH = "lecture_data.db"
+
+BATCH_SIZE = 5000
+
+LECTURE_COLUMNS = {
+    "title": "TEXT",
+    "description": "TEXT",
+    "department": "TEXT",
+    "year": "TEXT",
+    "semester": "TEXT",
+    "no_lectures": "INTEGER",
+    "lecturer": "TEXT",
+    "url": "TEXT",
+    "access": "INTEGER",
+}
+LECTURE_KEY = ("url",)
+
+# hash of a lecture's metadata, only changed lectures are rewritten
+LECTURE_HASH = "content_hash"
+
+# TEXT affinity keeps comparisons such as `year < 2024` in visuals.py working as with pandas-written tables
+CATALOGUE_COLUMNS = {
+    "number": "TEXT",
+    "title": "TEXT",
+    "year": "TEXT",
+    "semester": "TEXT",
+    "credits": "TEXT",
+    "lecture/recitation": "TEXT",
+}
+CATALOGUE_KEY = ("number", "year", "semester")
+
+# lecture series (by URL) -> the catalogue course it records, written by matching.py
+MATCH_COLUMNS = {
+    "url": "TEXT",
+    "number": "TEXT",
+    "year": "TEXT",
+    "semester": "TEXT",
+    "score": "REAL",
+}
+MATCH_KEY = ("url",)
+
+# semester names in portal URLs -> semester codes of the course catalogue
+SEMESTER_CODES = {"spring": "S", "autumn": "W"}
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS lectures_year ON lectures (year)",
+    "CREATE INDEX IF NOT EXISTS lectures_department_year ON lectures (department, year)",
+    "CREATE INDEX IF NOT EXISTS catalogue_year ON catalogue (year)",
+    "CREATE INDEX IF NOT EXISTS matches_course ON matches (number, year, semester)",
+    "CREATE INDEX IF NOT EXISTS lecture_history_valid_from ON lecture_history (valid_from)",
+    "CREATE INDEX IF NOT EXISTS lecture_history_valid_to ON lecture_history (valid_to)",
+]
+
+
+def _quote(column):
+    return '"' + column + '"'
+
+
+def _create_table(conn, table, columns, key):
+    """
+    Creates a table with its primary key. Tables written by earlier versions (pandas.to_sql) have no key and may lack
+    columns: missing columns are added and the key is enforced by a unique index instead. Their rows without a value
+    for a key column (e.g. catalogue entries written before semesters were recorded) can never be matched by an
+    upsert and would be counted next to the keyed rows replacing them, so they are dropped; the next run of the
+    respective stage fetches them again.
+    """
+    definitions = ", ".join(f"{_quote(column)} {kind}" for column, kind in columns.items())
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definitions}, PRIMARY KEY ({', '.join(key)}))")
+
+    existing = {row[1]: row[5] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for column, kind in columns.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {_quote(column)} {kind}")
+    if not any(existing.values()):
+        unkeyed = " OR ".join(f"{_quote(column)} IS NULL" for column in key)
+        dropped = conn.execute(f"DELETE FROM {table} WHERE {unkeyed}").rowcount
+        if dropped:
+            print(f"Dropped {dropped} rows of {table} written by an earlier version without a key, fetch them again")
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_key ON {table} ({', '.join(key)})")
+
+
+_LECTURE_SEMESTER = "CASE {row}.semester " + " ".join(
+    f"WHEN '{name}' THEN '{code}'" for name, code in SEMESTER_CODES.items()) + " ELSE COALESCE({row}.semester, '') END"
+
+
+def _lecture_delta(row, sign):
+    """Statement adding (sign=1) or removing (sign=-1) a lecture row's contribution to `lecture_summary`."""
+    return f'''
+        INSERT INTO lecture_summary (department, year, semester, accessible_count, total_count)
+        VALUES ({row}.department, {row}.year, {_LECTURE_SEMESTER.format(row=row)},
+                {sign} * (COALESCE({row}.access, 0) = 1), {sign})
+        ON CONFLICT (department, year, semester) DO UPDATE SET
+            accessible_count = accessible_count + excluded.accessible_count,
+            total_count = total_count + excluded.total_count;
+    ''' + ("DELETE FROM lecture_summary WHERE total_count = 0;" if sign < 0 else "")
+
+
+def _catalogue_delta(row, sign):
+    """Statement adding (sign=1) or removing (sign=-1) a catalogue row's contribution to `catalogue_summary`."""
+    return f'''
+        INSERT INTO catalogue_summary (year, semester, total_count)
+        VALUES ({row}.year, COALESCE({row}.semester, ''), {sign})
+        ON CONFLICT (year, semester) DO UPDATE SET total_count = total_count + excluded.total_count;
+    ''' + ("DELETE FROM catalogue_summary WHERE total_count = 0;" if sign < 0 else "")
+
+
+SUMMARY_TRIGGERS = {
+    "lectures_summary_insert": f"AFTER INSERT ON lectures BEGIN {_lecture_delta('NEW', 1)} END",
+    "lectures_summary_delete": f"AFTER DELETE ON lectures BEGIN {_lecture_delta('OLD', -1)} END",
+    "lectures_summary_update":
+        f"AFTER UPDATE ON lectures BEGIN {_lecture_delta('OLD', -1)} {_lecture_delta('NEW', 1)} END",
+    "catalogue_summary_insert": f"AFTER INSERT ON catalogue BEGIN {_catalogue_delta('NEW', 1)} END",
+    "catalogue_summary_delete": f"AFTER DELETE ON catalogue BEGIN {_catalogue_delta('OLD', -1)} END",
+    "catalogue_summary_update":
+        f"AFTER UPDATE ON catalogue BEGIN {_catalogue_delta('OLD', -1)} {_catalogue_delta('NEW', 1)} END",
+}
+
+
+def refresh_summaries(conn):
+    """
+    Rebuilds the summary tables from the raw tables. Only needed once for databases written before the summaries
+    existed; afterwards the triggers keep them up to date.
+    """
+    conn.execute("DELETE FROM lecture_summary")
+    conn.execute(f'''
+        INSERT INTO lecture_summary (department, year, semester, accessible_count, total_count)
+        SELECT department, year, {_LECTURE_SEMESTER.format(row="lectures")} AS sem,
+               SUM(COALESCE(access, 0) = 1), COUNT(*)
+        FROM lectures GROUP BY department, year, sem
+    ''')
+    conn.execute("DELETE FROM catalogue_summary")
+    conn.execute('''
+        INSERT INTO catalogue_summary (year, semester, total_count)
+        SELECT year, COALESCE(semester, '') AS sem, COUNT(*) FROM catalogue GROUP BY year, sem
+    ''')
+
+
+def _create_summaries(conn):
+    """Creates the summary tables and their triggers, filling them from existing rows on first use."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lecture_summary'").fetchone()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS lecture_summary (
+            department TEXT,
+            year TEXT,
+            semester TEXT,
+            accessible_count INTEGER NOT NULL DEFAULT 0,
+            total_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (department, year, semester)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS catalogue_summary (
+            year TEXT,
+            semester TEXT,
+            total_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (year, semester)
+        )
+    ''')
+    for name, body in SUMMARY_TRIGGERS.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    if not exists:
+        refresh_summaries(conn)
+
+
+# full-text index -> (indexed table, indexed columns)
+SEARCH_INDEXES = {
+    "lecture_search": ("lectures", ["title", "description", "lecturer"]),
+    "catalogue_search": ("catalogue", ["title"]),
+}
+
+
+def _search_delta(index, columns, row, command=None):
+    """Statement adding a row to a full-text index, or removing it with command='delete'."""
+    names = ", ".join(["rowid"] + columns)
+    values = ", ".join([f"{row}.rowid"] + [f"{row}.{_quote(column)}" for column in columns])
+    if command:
+        return f"INSERT INTO {index} ({index}, {names}) VALUES ('{command}', {values});"
+    return f"INSERT INTO {index} ({names}) VALUES ({values});"
+
+
+def _search_triggers(index, table, columns):
+    changed = " OR ".join(f"OLD.{_quote(column)} IS NOT NEW.{_quote(column)}" for column in columns)
+    return {
+        f"{index}_insert": f"AFTER INSERT ON {table} BEGIN {_search_delta(index, columns, 'NEW')} END",
+        f"{index}_delete": f"AFTER DELETE ON {table} BEGIN {_search_delta(index, columns, 'OLD', 'delete')} END",
+        # upserts rewrite every column, only reindex rows whose text changed
+        f"{index}_update": f"AFTER UPDATE ON {table} WHEN {changed} BEGIN "
+                           f"{_search_delta(index, columns, 'OLD', 'delete')} {_search_delta(index, columns, 'NEW')} END",
+    }
+
+
+def rebuild_search(conn):
+    """
+    Rebuilds the full-text indexes from the raw tables. Only needed for databases written before the indexes existed
+    or after a VACUUM, which may renumber the rowids the indexes refer to.
+    """
+    for index in SEARCH_INDEXES:
+        conn.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+
+
+def _create_search(conn):
+    """Creates the FTS5 indexes (external content, i.e. without a copy of the text) and their triggers."""
+    created = False
+    for index, (table, columns) in SEARCH_INDEXES.items():
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (index,)).fetchone():
+            conn.execute(f'''
+                CREATE VIRTUAL TABLE {index} USING fts5 (
+                    {", ".join(map(_quote, columns))},
+                    content = {table}, content_rowid = rowid,
+                    tokenize = "unicode61 remove_diacritics 2", prefix = '2 3'
+                )
+            ''')
+            created = True
+        for name, body in _search_triggers(index, table, columns).items():
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    if created:
+        rebuild_search(conn)
+
+
+# timestamp of a version in UTC; 'now' is the same for all statements run for one written row
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+_HISTORY_COLUMNS = [column for column in LECTURE_COLUMNS if column != "url"] + [LECTURE_HASH]
+
+
+def _history_version(row):
+    """Statement adding the current state of a lecture row as a version starting now."""
+    names = ", ".join(map(_quote, _HISTORY_COLUMNS))
+    values = ", ".join(f"{row}.{_quote(column)}" for column in _HISTORY_COLUMNS)
+    # a second change within the same millisecond supersedes the version the first one added
+    return f"DELETE FROM lecture_history WHERE url = {row}.url AND valid_from = {NOW}; " \
+           f"INSERT INTO lecture_history (url, valid_from, {names}) VALUES ({row}.url, {NOW}, {values});"
+
+
+def _history_close(row):
+    """Statement ending the open version of a lecture row now."""
+    return f"UPDATE lecture_history SET valid_to = {NOW} WHERE url = {row}.url AND valid_to IS NULL;"
+
+
+HISTORY_TRIGGERS = {
+    "lectures_history_insert": f"AFTER INSERT ON lectures BEGIN {_history_version('NEW')} END",
+    "lectures_history_update": f"AFTER UPDATE ON lectures WHEN OLD.{LECTURE_HASH} IS NOT NEW.{LECTURE_HASH} "
+                               f"BEGIN {_history_close('OLD')} {_history_version('NEW')} END",
+    "lectures_history_delete": f"AFTER DELETE ON lectures BEGIN {_history_close('OLD')} END",
+}
+
+
+def content_hash(values):
+    """
+    Hashes the metadata of a row. Values are normalised first (booleans as integers), so a record and the row it was
+    stored as hash alike.
+
+    Args:
+        values (iterable): The column values of the row.
+
+    Returns:
+        str: The hash.
+    """
+    values = [int(value) if isinstance(value, bool) else value for value in values]
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False, default=str).encode()).hexdigest()
+
+
+def _create_history(conn):
+    """
+    Creates the version history of the lectures and its triggers. On first use the hashes of existing lectures are
+    computed and their current state becomes their first version.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lecture_history'").fetchone()
+    definitions = ", ".join(f"{_quote(column)} {LECTURE_COLUMNS.get(column, 'TEXT')}" for column in _HISTORY_COLUMNS)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS lecture_history (
+            url TEXT NOT NULL,
+            valid_from TEXT NOT NULL,
+            valid_to TEXT,
+            {definitions},
+            PRIMARY KEY (url, valid_from)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS snapshot_runs (
+            id INTEGER PRIMARY KEY,
+            started TEXT NOT NULL,
+            finished TEXT
+        )
+    ''')
+    if not exists:
+        columns = [column for column in LECTURE_COLUMNS if column != "url"]
+        rows = conn.execute(f"SELECT url, {', '.join(map(_quote, columns))} FROM lectures").fetchall()
+        conn.executemany(f"UPDATE lectures SET {LECTURE_HASH} = ? WHERE url = ?",
+                         [(content_hash(row[1:]), row[0]) for row in rows])
+        names = ", ".join(map(_quote, _HISTORY_COLUMNS))
+        conn.execute(f"INSERT INTO lecture_history (url, valid_from, {names}) "
+                     f"SELECT url, {NOW}, {names} FROM lectures")
+    for name, body in HISTORY_TRIGGERS.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+# tables whose writes bump a counter in `table_versions`, so readers caching derived data notice any change
+VERSIONED_TABLES = ["matches"]
+
+
+def _version_bump(table):
+    return f"UPDATE table_versions SET version = version + 1 WHERE name = '{table}';"
+
+
+def _create_versions(conn):
+    """Creates the write counters of `VERSIONED_TABLES` and the triggers bumping them."""
+    conn.execute("CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+    for table in VERSIONED_TABLES:
+        conn.execute("INSERT OR IGNORE INTO table_versions VALUES (?, 0)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} "
+                         f"AFTER {event} ON {table} BEGIN {_version_bump(table)} END")
+
+
+def connect(db_path=DB_PATH):
+    """
+    Opens the lecture database in WAL mode and makes sure the schema exists.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+
+    Returns:
+        sqlite3.Connection: The open connection.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    _create_table(conn, "lectures", {**LECTURE_COLUMNS, LECTURE_HASH: "TEXT"}, LECTURE_KEY)
+    _create_table(conn, "catalogue", CATALOGUE_COLUMNS, CATALOGUE_KEY)
+    _create_table(conn, "matches", MATCH_COLUMNS, MATCH_KEY)
+    _create_summaries(conn)
+    _create_search(conn)
+    _create_history(conn)
+    _create_versions(conn)
+    for index in INDEXES:
+        conn.execute(index)
+    conn.commit()
+    return conn
+
+
+def upsert(conn, table, columns, key, records, batch_size=BATCH_SIZE, hash_column=None):
+    """
+    Inserts records into a table, updating rows whose key already exists.
+
+    With a `hash_column`, the hash of each record's values is stored alongside it and existing rows are only
+    rewritten if their hash differs, so unchanged records cost no writes.
+
+    Args:
+        conn (sqlite3.Connection): An open connection, see `connect`.
+        table (str): The table to write to.
+        columns (iterable): The columns to write; missing fields of a record are stored as NULL.
+        key (tuple): The columns forming the table's key.
+        records (iterable): Dictionaries to write, consumed lazily.
+        batch_size (int): Number of records written per transaction.
+        hash_column (str, optional): Column storing the hash of the other columns.
+
+    Returns:
+        int: The number of records processed.
+    """
+    columns = list(columns)
+    hashed = [c for c in columns if c not in key]
+    written_columns = columns + ([hash_column] if hash_column else [])
+    names = ", ".join(map(_quote, written_columns))
+    placeholders = ", ".join("?" * len(written_columns))
+    updates = ", ".join(f"{_quote(c)} = excluded.{_quote(c)}" for c in written_columns if c not in key)
+    statement = f'''
+        INSERT INTO {table} ({names}) VALUES ({placeholders})
+        ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}
+    '''
+    if hash_column:
+        statement += f" WHERE {table}.{_quote(hash_column)} IS NOT excluded.{_quote(hash_column)}"
+
+    def row(record):
+        values = tuple(record.get(column) for column in columns)
+        if hash_column:
+            values += (content_hash(record.get(column) for column in hashed),)
+        return values
+
+    records = iter(records)
+    written = 0
+    while True:
+        rows = [row(record) for record in islice(records, batch_size)]
+        if not rows:
+            break
+        with METRICS.stage("persist"), conn:
+            conn.executemany(statement, rows)
+        written += len(rows)
+    return written
+
+
+def store_lectures(records, db_path=DB_PATH, batch_size=BATCH_SIZE):
+    """
+    Upserts lecture metadata into the `lectures` table, keyed by URL. Lectures whose metadata is unchanged are not
+    rewritten; changed ones get a new version in `lecture_history`.
+
+    Args:
+        records (iterable): Metadata dictionaries as returned by `scraper.retrieve_meta_data`.
+        db_path (str): Path to the SQLite database.
+        batch_size (int): Number of records written per transaction.
+
+    Returns:
+        int: The number of records written.
+    """
+    conn = connect(db_path)
+    written = upsert(conn, "lectures", LECTURE_COLUMNS, LECTURE_KEY, records, batch_size, LECTURE_HASH)
+    conn.close()
+    return written
+
+
+def store_catalogue(entries, db_path=DB_PATH, batch_size=BATCH_SIZE):
+    """
+    Upserts catalogue entries into the `catalogue` table, keyed by (number, year, semester).
+
+    Args:
+        entries (iterable): Catalogue entries as returned by `scraper.get_course_catalogue_data`.
+        db_path (str): Path to the SQLite database.
+        batch_size (int): Number of records written per transaction.
+
+    Returns:
+        int: The number of entries written.
+    """
+    conn = connect(db_path)
+    written = upsert(conn, "catalogue", CATALOGUE_COLUMNS, CATALOGUE_KEY, entries, batch_size)
+    conn.close()
+    return written
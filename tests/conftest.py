@@ -0,0 +1,24 @@
+"""
+Fixtures of the unit tests: a fresh lecture database in a temporary directory.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "lecture_data.db")
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = storage.connect(db_path)
+    yield conn
+    conn.close()
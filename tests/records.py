@@ -0,0 +1,47 @@
+"""
+Records and legacy tables shared by the unit tests.
+"""
+
+import sqlite3
+
+import pandas as pd
+
+
+def lecture(number, **fields):
+    """A lecture record as built by `scraper.build_meta_data`."""
+    record = {
+        "title": f"Lecture {number}",
+        "description": "Recordings of the lecture",
+        "department": "d-phys",
+        "year": "2020",
+        "semester": "autumn",
+        "no_lectures": 12,
+        "lecturer": "A. Lecturer",
+        "url": f"https://video.ethz.ch/lectures/d-phys/2020/autumn/{number}.html",
+        "access": True,
+    }
+    record.update(fields)
+    return record
+
+
+def course(number, **fields):
+    """A catalogue entry as returned by `scraper.get_course_catalogue_data`."""
+    entry = {
+        "number": f"402-{number:04d}-00L",
+        "title": f"Course {number}",
+        "year": "2020",
+        "semester": "W",
+        "credits": "6",
+        "lecture/recitation": "4V+2U",
+    }
+    entry.update(fields)
+    return entry
+
+
+def legacy_database(db_path, lectures, catalogue):
+    """Writes tables the way earlier versions did, with pandas.to_sql and without keys or semesters."""
+    conn = sqlite3.connect(db_path)
+    for table, rows in (("lectures", lectures), ("catalogue", catalogue)):
+        if rows:
+            pd.DataFrame(rows).to_sql(table, conn, index=False)
+    conn.close()
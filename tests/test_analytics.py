@@ -0,0 +1,64 @@
+"""
+Tests of the analytics cube (analytics.py).
+"""
+
+import storage
+from analytics import ALL, data_version, load_cube, view
+from records import course, lecture
+
+
+def test_cube_counts_and_rollups(db_path, conn):
+    storage.upsert(conn, "lectures", storage.LECTURE_COLUMNS, storage.LECTURE_KEY, [
+        lecture(1), lecture(2, access=False), lecture(3, department="d-math", semester="spring")])
+    storage.upsert(conn, "catalogue", storage.CATALOGUE_COLUMNS, storage.CATALOGUE_KEY,
+                   [course(1), course(2), course(3, semester="S"), course(4, semester="S")])
+    storage.upsert(conn, "matches", storage.MATCH_COLUMNS, storage.MATCH_KEY, [
+        {"url": lecture(1)["url"], "number": course(1)["number"], "year": "2020", "semester": "W", "score": 1.0},
+        {"url": lecture(2)["url"], "number": course(1)["number"], "year": "2020", "semester": "W", "score": 0.9}])
+
+    cube = load_cube(db_path, cache_dir=None)
+
+    total = cube.loc[(ALL, ALL, ALL)]
+    assert (total.total_count, total.accessible_count, total.catalogue_count) == (3, 2, 4)
+    assert (total.recorded_courses, total.accessible_courses) == (1, 1)
+    assert view(cube, ["semester"])[["semester", "total_count", "catalogue_count"]].values.tolist() == [
+        ["S", 1, 2], ["W", 2, 2]]
+    departments = view(cube, ["department"], until=2024)
+    assert departments[["department", "total_count"]].values.tolist() == [["d-math", 1], ["d-phys", 2]]
+    assert departments["catalogue_count"].isna().all()
+
+
+def test_cached_cube_follows_match_changes(db_path, conn, tmp_path):
+    storage.upsert(conn, "lectures", storage.LECTURE_COLUMNS, storage.LECTURE_KEY, [lecture(1)])
+    storage.upsert(conn, "catalogue", storage.CATALOGUE_COLUMNS, storage.CATALOGUE_KEY,
+                   [course(1), course(2, year="2021")])
+    match = {"url": lecture(1)["url"], "number": course(1)["number"], "year": "2020", "semester": "W", "score": 1.0}
+    storage.upsert(conn, "matches", storage.MATCH_COLUMNS, storage.MATCH_KEY, [match])
+    cache_dir = str(tmp_path / "cube")
+    before = data_version(conn)
+    assert view(load_cube(db_path, cache_dir), ["year"])["recorded_courses"].tolist() == [1, 0]
+
+    # remapped to another course with the same count and score
+    with conn:
+        conn.execute("DELETE FROM matches")
+    storage.upsert(conn, "matches", storage.MATCH_COLUMNS, storage.MATCH_KEY,
+                   [dict(match, number=course(2)["number"], year="2021")])
+
+    assert data_version(conn) != before
+    assert view(load_cube(db_path, cache_dir), ["year"])["recorded_courses"].tolist() == [0, 1]
+
+
+def test_course_recorded_in_two_departments_counts_once_overall(db_path, conn):
+    storage.upsert(conn, "lectures", storage.LECTURE_COLUMNS, storage.LECTURE_KEY, [
+        lecture(1), lecture(2, department="d-math")])
+    storage.upsert(conn, "catalogue", storage.CATALOGUE_COLUMNS, storage.CATALOGUE_KEY, [course(1)])
+    storage.upsert(conn, "matches", storage.MATCH_COLUMNS, storage.MATCH_KEY, [
+        {"url": lecture(number)["url"], "number": course(1)["number"], "year": "2020", "semester": "W", "score": 1.0}
+        for number in (1, 2)])
+
+    cube = load_cube(db_path, cache_dir=None)
+
+    assert view(cube, ["department"])["recorded_courses"].tolist() == [1, 1]
+    total = cube.loc[(ALL, ALL, ALL)]
+    assert (total.total_count, total.catalogue_count, total.recorded_courses) == (2, 1, 1)
+    assert total.recorded_fraction == 1.0
@@ -0,0 +1,139 @@
+"""
+Tests of the HTTP response cache (cache.py) and its use by `scraper.fetch`.
+"""
+
+import os
+
+import pytest
+import requests
+
+import cache
+import scraper
+from cache import HTTPCache, default_ttls, HOUR, DAY
+
+
+class Clock:
+    """Replaces time.time in cache.py by a clock that only moves when told to."""
+
+    def __init__(self, monkeypatch, now=1_000_000.0):
+        self.now = now
+        monkeypatch.setattr(cache.time, "time", lambda: self.now)
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    return Clock(monkeypatch)
+
+
+@pytest.fixture
+def http_cache(tmp_path):
+    http_cache = HTTPCache(str(tmp_path / "cache"), ttls=[(r"/current/", 10)], default_ttl=100)
+    yield http_cache
+    http_cache.close()
+
+
+def test_entries_expire_after_their_ttl(http_cache, clock):
+    http_cache.store("https://example.com/current/a", b"a")
+    http_cache.store("https://example.com/archive/b", b"b")
+    assert http_cache.lookup("https://example.com/current/a").body == b"a"
+    assert http_cache.lookup("https://example.com/current/a").fresh
+
+    clock.advance(20)
+    assert not http_cache.lookup("https://example.com/current/a").fresh
+    assert http_cache.lookup("https://example.com/archive/b").fresh
+    clock.advance(100)
+    assert not http_cache.lookup("https://example.com/archive/b").fresh
+    assert http_cache.lookup("https://example.com/unknown") is None
+
+
+def test_default_ttls():
+    rules = HTTPCache(ttls=default_ttls(2023))
+    assert rules.ttl_for("https://video.ethz.ch/lectures/d-phys/2023/autumn.html") == HOUR
+    assert rules.ttl_for("https://video.ethz.ch/lectures/d-phys/2019/autumn.html") == 30 * DAY
+    assert rules.ttl_for("https://www.vvz.ethz.ch/Vorlesungsverzeichnis/sucheLehrangebot.view?semkez=2023W") == HOUR
+    assert rules.ttl_for("https://video.ethz.ch/lectures.html") == DAY
+
+
+class FakeTransport:
+    """Answers with queued responses and records the headers of each request."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append(headers or {})
+        status, body, response_headers = self.responses.pop(0)
+        response = requests.Response()
+        response.status_code = status
+        response._content = body
+        response.headers = requests.structures.CaseInsensitiveDict(response_headers)
+        return response
+
+
+def test_stale_entries_are_revalidated(http_cache, clock, monkeypatch):
+    url = "https://example.com/current/page"
+    transport = FakeTransport(
+        (200, b"body", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+        (304, b"", {}),
+        (200, b"new body", {"ETag": '"v2"'}),
+    )
+    monkeypatch.setattr(scraper, "TRANSPORT", transport)
+    monkeypatch.setattr(scraper, "CACHE", http_cache)
+    monkeypatch.setattr(scraper, "SCHEDULER", None)
+
+    assert scraper.fetch(url) == b"body"
+    assert scraper.fetch(url) == b"body"  # fresh, served without a request
+    assert len(transport.requests) == 1
+
+    clock.advance(20)
+    assert scraper.fetch(url) == b"body"  # 304 Not Modified
+    assert transport.requests[1] == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    assert http_cache.lookup(url).fresh
+
+    clock.advance(20)
+    assert scraper.fetch(url) == b"new body"
+    assert http_cache.lookup(url).etag == '"v2"'
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    bodies = {name: os.urandom(1000) for name in "abcd"}  # incompressible, about 1 KB stored each
+    http_cache = HTTPCache(str(tmp_path / "cache"), max_bytes=3500)
+    for name in "abc":
+        http_cache.store(f"https://example.com/{name}", bodies[name])
+        clock.advance(1)
+    http_cache.lookup("https://example.com/a")
+    clock.advance(1)
+
+    http_cache.store("https://example.com/d", bodies["d"])
+
+    assert http_cache.lookup("https://example.com/b") is None
+    for name in "acd":
+        assert http_cache.lookup(f"https://example.com/{name}").body == bodies[name]
+    http_cache.close()
+
+    # the running size total matches the stored bodies after reopening
+    http_cache = HTTPCache(str(tmp_path / "cache"), max_bytes=3500)
+    http_cache.lookup("https://example.com/a")
+    assert http_cache._total == http_cache._conn.execute("SELECT SUM(size) FROM responses").fetchone()[0]
+    http_cache.store("https://example.com/a", bodies["a"])
+    assert http_cache._total == http_cache._conn.execute("SELECT SUM(size) FROM responses").fetchone()[0]
+    http_cache.close()
+
+
+def test_access_times_are_written_in_batches(http_cache, clock, monkeypatch):
+    monkeypatch.setattr(cache, "ACCESS_BATCH", 2)
+    http_cache.store("https://example.com/a", b"a")
+    http_cache.store("https://example.com/b", b"b")
+    clock.advance(5)
+
+    def accessed():
+        return dict(http_cache._conn.execute("SELECT url, accessed_at FROM responses"))
+
+    http_cache.lookup("https://example.com/a")
+    assert accessed()["https://example.com/a"] == clock.now - 5
+    http_cache.lookup("https://example.com/b")
+    assert accessed() == {"https://example.com/a": clock.now, "https://example.com/b": clock.now}
@@ -0,0 +1,23 @@
+"""
+Tests of the course catalogue retrieval in scraper.py.
+"""
+
+import scraper
+
+
+def test_pages_beyond_a_windowed_pagination_are_fetched(monkeypatch):
+    # the pagination bar shows at most two pages ahead, like a windowed bar on a long semester
+    last_page = {"2020W": 6, "2020S": 1}
+    requested = []
+
+    def get_catalogue_page(semkez, page, year):
+        requested.append((semkez, page))
+        entry = {"number": f"{semkez}-{page}", "year": str(year), "semester": semkez[-1]}
+        return [entry], min(page + 2, last_page[semkez])
+
+    monkeypatch.setattr(scraper, "get_catalogue_page", get_catalogue_page)
+
+    entries = scraper.get_course_catalogue_data(2020, 2020, workers=4)
+
+    assert sorted(requested) == sorted([("2020W", page) for page in range(7)] + [("2020S", 0), ("2020S", 1)])
+    assert len(entries) == 9
@@ -0,0 +1,122 @@
+"""
+Tests of the resumable crawl (frontier.py).
+"""
+
+import pytest
+
+import frontier
+import scraper
+from frontier import Frontier, ROOT_URL, crawl_frontier
+
+PHYSICS = "https://video.ethz.ch/lectures/d-phys.html"
+MATHEMATICS = "https://video.ethz.ch/lectures/d-math.html"
+
+
+def test_failing_page_is_marked_and_the_crawl_continues(db_path, monkeypatch):
+    def visit(url, level):
+        if url == ROOT_URL:
+            return "root", "department", [PHYSICS, MATHEMATICS]
+        if url == MATHEMATICS:
+            raise ValueError("unexpected markup")
+        return url, "year", []
+
+    monkeypatch.setattr(frontier, "_visit", visit)
+
+    crawl_frontier(db_path)
+
+    conn = Frontier(db_path).conn
+    statuses = dict(conn.execute("SELECT url, status FROM frontier"))
+    assert statuses == {ROOT_URL: "done", PHYSICS: "done", MATHEMATICS: "failed"}
+
+
+def test_full_crawl_continues_a_scoped_crawl(db_path, monkeypatch):
+    math_year = "https://video.ethz.ch/lectures/d-math/2023.html"
+    phys_year = "https://video.ethz.ch/lectures/d-phys/2023.html"
+    pages = {
+        ROOT_URL: ("department", [PHYSICS, MATHEMATICS]),
+        PHYSICS: ("year", [phys_year]),
+        MATHEMATICS: ("year", [math_year]),
+    }
+
+    def visit(url, level):
+        child_level, children = pages.get(url, ("semester", []))
+        return url, child_level, children
+
+    monkeypatch.setattr(frontier, "_visit", visit)
+
+    crawl_frontier(db_path, departments=["d-phys"])
+    conn = Frontier(db_path).conn
+    statuses = dict(conn.execute("SELECT url, status FROM frontier"))
+    assert statuses[MATHEMATICS] == "pending"
+    assert math_year not in statuses
+
+    crawl_frontier(db_path)
+    statuses = dict(conn.execute("SELECT url, status FROM frontier"))
+    assert statuses[MATHEMATICS] == "done"
+    assert statuses[math_year] == "done"
+
+
+def test_visit_uses_the_link_backend_set_at_run_time(monkeypatch):
+    calls = []
+    monkeypatch.setattr(frontier, "fetch", lambda url: b"<html></html>")
+    monkeypatch.setattr(frontier, "run_parser", lambda parser, *args: calls.append(args) or [])
+    monkeypatch.setattr(scraper, "LINK_BACKEND", "bs4")
+
+    frontier._visit(ROOT_URL, "root")
+
+    assert calls == [(b"<html></html>", "root", ROOT_URL, "bs4")]
+
+
+def portal(*years):
+    """Child links of the pages of a portal with one department, one semester and one lecture per year."""
+    pages = {ROOT_URL: ("department", [PHYSICS]), PHYSICS: ("year", [])}
+    for year in years:
+        year_url = f"https://video.ethz.ch/lectures/d-phys/{year}.html"
+        semester_url = f"https://video.ethz.ch/lectures/d-phys/{year}/autumn.html"
+        pages[PHYSICS][1].append(year_url)
+        pages[year_url] = ("semester", [semester_url])
+        pages[semester_url] = ("lecture", [f"https://video.ethz.ch/lectures/d-phys/{year}/autumn/{year}1.html"])
+    return pages
+
+
+def recording_visit(pages, visited, interrupt=None):
+    def visit(url, level):
+        if url == interrupt:
+            raise KeyboardInterrupt
+        visited.append(url)
+        return url, *pages[url]
+    return visit
+
+
+def test_rerun_resumes_from_pending_pages(db_path, monkeypatch):
+    pages = portal(2020)
+    year_url = "https://video.ethz.ch/lectures/d-phys/2020.html"
+    semester_url = "https://video.ethz.ch/lectures/d-phys/2020/autumn.html"
+    visited = []
+    monkeypatch.setattr(frontier, "_visit", recording_visit(pages, visited, interrupt=year_url))
+    with pytest.raises(KeyboardInterrupt):
+        crawl_frontier(db_path, workers=1)
+    assert visited == [ROOT_URL, PHYSICS]
+
+    visited.clear()
+    monkeypatch.setattr(frontier, "_visit", recording_visit(pages, visited))
+    links = crawl_frontier(db_path, workers=1)
+
+    assert visited == [year_url, semester_url]
+    assert links == pages[semester_url][1]
+
+
+def test_incremental_crawl_revisits_only_pages_that_can_change(db_path, monkeypatch):
+    pages = portal(2022, 2024)
+    visited = []
+    monkeypatch.setattr(frontier, "_visit", recording_visit(pages, visited))
+    crawl_frontier(db_path, current_year=2024)
+    assert sorted(visited) == sorted(pages)
+
+    visited.clear()
+    crawl_frontier(db_path, incremental=True, current_year=2024)
+
+    assert sorted(visited) == sorted([ROOT_URL, PHYSICS] + [url for url in pages if "/2024" in url])
+    conn = Frontier(db_path).conn
+    statuses = dict(conn.execute("SELECT url, status FROM frontier WHERE level != 'lecture'"))
+    assert set(statuses.values()) == {"done"}
@@ -0,0 +1,118 @@
+"""
+Tests of the versioned lecture history kept by storage.py and queried by history.py.
+"""
+
+import time
+
+import storage
+from records import lecture, legacy_database
+from history import as_of, changes, run_window, snapshot_run
+
+
+def store(conn, *records):
+    storage.upsert(conn, "lectures", storage.LECTURE_COLUMNS, storage.LECTURE_KEY, records,
+                   hash_column=storage.LECTURE_HASH)
+    time.sleep(0.002)  # versions are timestamped to the millisecond
+
+
+def now(conn):
+    return conn.execute(f"SELECT {storage.NOW}").fetchone()[0]
+
+
+def versions(conn, url):
+    return conn.execute("SELECT valid_from, valid_to, title, access FROM lecture_history WHERE url = ? "
+                        "ORDER BY valid_from", (url,)).fetchall()
+
+
+def test_insert_opens_a_version(conn):
+    store(conn, lecture(1))
+
+    [(valid_from, valid_to, title, access)] = versions(conn, lecture(1)["url"])
+    assert valid_to is None and (title, access) == ("Lecture 1", 1)
+    assert conn.execute(f"SELECT {storage.LECTURE_HASH} FROM lectures").fetchone()[0] == storage.content_hash(
+        value for column, value in lecture(1).items() if column != "url")
+
+
+def test_unchanged_upsert_writes_nothing(conn):
+    store(conn, lecture(1), lecture(2))
+    changes_before = conn.total_changes
+
+    store(conn, lecture(1), lecture(2))
+
+    assert conn.total_changes == changes_before
+    assert len(versions(conn, lecture(1)["url"])) == 1
+
+
+def test_change_closes_the_old_version_and_opens_a_new_one(conn):
+    store(conn, lecture(1))
+    store(conn, lecture(1, access=False))
+
+    (first_from, first_to, _, first_access), (second_from, second_to, _, second_access) = \
+        versions(conn, lecture(1)["url"])
+    assert first_to == second_from and first_from < second_from and second_to is None
+    assert (first_access, second_access) == (1, 0)
+
+
+def test_delete_closes_the_version(conn):
+    store(conn, lecture(1))
+    with conn:
+        conn.execute("DELETE FROM lectures")
+
+    [(_, valid_to, _, _)] = versions(conn, lecture(1)["url"])
+    assert valid_to is not None
+
+
+def test_changes_within_one_millisecond_keep_the_last(conn):
+    store(conn, lecture(1))
+    storage.upsert(conn, "lectures", storage.LECTURE_COLUMNS, storage.LECTURE_KEY,
+                   [lecture(1, title="B"), lecture(1, title="C")], hash_column=storage.LECTURE_HASH)
+
+    history = versions(conn, lecture(1)["url"])
+    assert history[-1][1:3] == (None, "C")
+    assert all(earlier[1] == later[0] for earlier, later in zip(history, history[1:]))
+
+
+def test_history_is_backfilled_for_legacy_tables(db_path):
+    legacy_database(db_path, [lecture(1), lecture(2)], [])
+
+    conn = storage.connect(db_path)
+    assert conn.execute(f"SELECT COUNT(*) FROM lectures WHERE {storage.LECTURE_HASH} IS NULL").fetchone() == (0,)
+    assert conn.execute("SELECT COUNT(*) FROM lecture_history WHERE valid_to IS NULL").fetchone() == (2,)
+
+    # the backfilled hashes match those of the records, so re-harvesting them writes nothing
+    changes_before = conn.total_changes
+    store(conn, lecture(1), lecture(2))
+    assert conn.total_changes == changes_before
+    conn.close()
+
+
+def test_as_of_and_changes(conn):
+    store(conn, lecture(1), lecture(2))
+    first = now(conn)
+    time.sleep(0.002)
+    store(conn, lecture(1, access=False), lecture(2, title="Renamed"), lecture(3))
+    with conn:
+        conn.execute("DELETE FROM lectures WHERE url = ?", (lecture(2)["url"],))
+    time.sleep(0.002)
+
+    assert [(entry["url"], entry["access"]) for entry in as_of(conn, first)] == [
+        (lecture(1)["url"], 1), (lecture(2)["url"], 1)]
+    assert [entry["url"] for entry in as_of(conn, now(conn))] == [lecture(1)["url"], lecture(3)["url"]]
+    assert as_of(conn, "2000-01-01") == []
+
+    listed = {(change["url"], change["change"]) for change in changes(conn, first)}
+    assert listed == {(lecture(1)["url"], "changed"), (lecture(2)["url"], "changed"),
+                      (lecture(2)["url"], "removed"), (lecture(3)["url"], "added")}
+    assert [(change["url"], change["old_access"], change["new_access"])
+            for change in changes(conn, first, access_only=True)] == [(lecture(1)["url"], 1, 0)]
+
+
+def test_run_window(db_path, conn):
+    with snapshot_run(db_path) as first:
+        store(conn, lecture(1))
+    with snapshot_run(db_path) as second:
+        store(conn, lecture(1, title="Renamed"), lecture(2))
+
+    listed = changes(conn, *run_window(conn, first, second))
+    assert sorted((change["url"], change["change"]) for change in listed) == [
+        (lecture(1)["url"], "changed"), (lecture(2)["url"], "added")]
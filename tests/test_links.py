@@ -0,0 +1,25 @@
+"""
+Tests of the link extraction backends (links.py).
+"""
+
+import pytest
+
+from links import available_backends, extract_hrefs
+
+PAGE = b"""<html><head><script>var link = '<a href="script.html">';</script></head><body>
+<!-- <a href="comment.html">old</a> -->
+<a title="a>b" href="d.html">d</a>
+<a href=e.html>e</a>
+<A HREF='f.html'>f</A>
+<a name="anchor">no href</a>
+<abbr href="abbr.html">not an anchor</abbr>
+<a href="g.html?x=1&amp;y=2">g</a>
+<a
+  class="wrapped" href="h.html">h</a>
+</body></html>"""
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_backends_agree_with_the_reference(backend):
+    assert extract_hrefs(PAGE, backend) == extract_hrefs(PAGE, "bs4")
+    assert extract_hrefs(PAGE, backend) == ["d.html", "e.html", "f.html", "g.html?x=1&y=2", "h.html"]
@@ -0,0 +1,56 @@
+"""
+Tests of the FTS5 indexes kept in sync by storage.py and queried by search.py.
+"""
+
+import storage
+from records import course, lecture, legacy_database
+from search import match_expression, search_catalogue, search_lectures
+
+
+def urls(results):
+    return [result["url"] for result in results]
+
+
+def test_index_follows_inserts_updates_and_deletes(conn):
+    storage.upsert(conn, "lectures", storage.LECTURE_COLUMNS, storage.LECTURE_KEY, [
+        lecture(1, title="Quantum Mechanics I"), lecture(2, title="Analysis II", lecturer="Quentin Person")])
+    assert urls(search_lectures(conn, "quantum mechanics")) == [lecture(1)["url"]]
+    # title hits rank above lecturer hits
+    assert urls(search_lectures(conn, "qu")) == [lecture(1)["url"], lecture(2)["url"]]
+
+    storage.upsert(conn, "lectures", storage.LECTURE_COLUMNS, storage.LECTURE_KEY,
+                   [lecture(1, title="Statistical Physics")])
+    assert search_lectures(conn, "quantum") == []
+    assert urls(search_lectures(conn, "statistical")) == [lecture(1)["url"]]
+
+    with conn:
+        conn.execute("DELETE FROM lectures WHERE url = ?", (lecture(1)["url"],))
+    assert search_lectures(conn, "statistical") == []
+    # raises if the index disagrees with the content table
+    conn.execute("INSERT INTO lecture_search (lecture_search) VALUES ('integrity-check')")
+
+
+def test_filters_and_catalogue(conn):
+    storage.upsert(conn, "lectures", storage.LECTURE_COLUMNS, storage.LECTURE_KEY, [
+        lecture(1, title="Physik I"), lecture(2, title="Physik I", year="2021")])
+    storage.upsert(conn, "catalogue", storage.CATALOGUE_COLUMNS, storage.CATALOGUE_KEY,
+                   [course(1, title="Physik I"), course(2, title="Mathematik")])
+
+    assert urls(search_lectures(conn, "physik", year=2021)) == [lecture(2)["url"]]
+    assert search_lectures(conn, "physik", department="d-math") == []
+    assert [result["number"] for result in search_catalogue(conn, "physik")] == [course(1)["number"]]
+
+
+def test_index_is_rebuilt_for_existing_rows(db_path):
+    legacy_database(db_path, [lecture(1, title="Quantum Mechanics")], [course(1, title="Quantenmechanik")])
+
+    conn = storage.connect(db_path)
+    assert urls(search_lectures(conn, "quantum")) == [lecture(1)["url"]]
+    assert len(search_catalogue(conn, "quantenmechanik")) == 1
+    conn.close()
+
+
+def test_match_expression_quotes_words():
+    assert match_expression("C++ / Java: basics") == '"C" "Java" "basics"*'
+    assert match_expression("data-science", prefix=False) == '"data" "science"'
+    assert match_expression("--") is None
@@ -0,0 +1,105 @@
+"""
+Tests of the schema, upserts and migrations of storage.py.
+"""
+
+import storage
+from records import course, lecture, legacy_database
+
+
+def test_create_table_migrates_legacy_tables(db_path):
+    legacy_database(db_path,
+                    [{key: value for key, value in lecture(1).items() if key != "semester"}],
+                    [{key: value for key, value in course(1).items() if key != "semester"}])
+
+    conn = storage.connect(db_path)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(lectures)")}
+    assert {"semester", storage.LECTURE_HASH} <= columns
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(lectures)")}
+    assert "lectures_key" in indexes
+    conn.close()
+
+    # the unique index on the key turns writes of an existing lecture into updates
+    storage.store_lectures([lecture(1, title="Renamed"), lecture(2)], db_path)
+    conn = storage.connect(db_path)
+    assert conn.execute("SELECT url, title FROM lectures ORDER BY url").fetchall() == [
+        (lecture(1)["url"], "Renamed"), (lecture(2)["url"], "Lecture 2")]
+    conn.close()
+
+
+def test_create_table_drops_legacy_rows_without_key(db_path):
+    legacy_database(db_path, [lecture(1)],
+                    [{key: value for key, value in course(number).items() if key != "semester"} for number in (1, 2)])
+
+    storage.store_catalogue([course(1, semester="W"), course(1, semester="S")], db_path)
+
+    conn = storage.connect(db_path)
+    assert conn.execute("SELECT number, semester FROM catalogue ORDER BY semester").fetchall() == [
+        (course(1)["number"], "S"), (course(1)["number"], "W")]
+    assert conn.execute("SELECT year, semester, total_count FROM catalogue_summary ORDER BY semester").fetchall() == [
+        ("2020", "S", 1), ("2020", "W", 1)]
+    conn.close()
+
+
+def test_upsert_updates_existing_keys(conn):
+    storage.upsert(conn, "catalogue", storage.CATALOGUE_COLUMNS, storage.CATALOGUE_KEY,
+                   [course(1), course(2)])
+    written = storage.upsert(conn, "catalogue", storage.CATALOGUE_COLUMNS, storage.CATALOGUE_KEY,
+                             [course(1, title="Renamed"), course(3)], batch_size=1)
+
+    assert written == 2
+    assert conn.execute("SELECT title FROM catalogue ORDER BY number").fetchall() == [
+        ("Renamed",), ("Course 2",), ("Course 3",)]
+
+
+def summary(conn):
+    return conn.execute("SELECT department, year, semester, accessible_count, total_count "
+                        "FROM lecture_summary ORDER BY department, year, semester").fetchall()
+
+
+def test_summaries_follow_inserts_updates_and_deletes(conn):
+    storage.upsert(conn, "lectures", storage.LECTURE_COLUMNS, storage.LECTURE_KEY, [
+        lecture(1), lecture(2, access=False), lecture(3, semester="spring", department="d-math")])
+    storage.upsert(conn, "catalogue", storage.CATALOGUE_COLUMNS, storage.CATALOGUE_KEY,
+                   [course(1), course(2), course(3, semester="S")])
+    assert summary(conn) == [("d-math", "2020", "S", 1, 1), ("d-phys", "2020", "W", 1, 2)]
+    assert conn.execute("SELECT * FROM catalogue_summary ORDER BY semester").fetchall() == [
+        ("2020", "S", 1), ("2020", "W", 2)]
+
+    # an update moves the row's contribution between groups
+    storage.upsert(conn, "lectures", storage.LECTURE_COLUMNS, storage.LECTURE_KEY,
+                   [lecture(2, access=True), lecture(3, semester="spring", department="d-math", year="2021")])
+    storage.upsert(conn, "catalogue", storage.CATALOGUE_COLUMNS, storage.CATALOGUE_KEY, [course(2, title="New")])
+    assert summary(conn) == [("d-math", "2021", "S", 1, 1), ("d-phys", "2020", "W", 2, 2)]
+    assert conn.execute("SELECT * FROM catalogue_summary ORDER BY semester").fetchall() == [
+        ("2020", "S", 1), ("2020", "W", 2)]
+
+    # groups whose last row is deleted disappear
+    with conn:
+        conn.execute("DELETE FROM lectures WHERE department = 'd-math'")
+        conn.execute("DELETE FROM catalogue WHERE semester = 'S'")
+        conn.execute("DELETE FROM lectures WHERE url = ?", (lecture(1)["url"],))
+    assert summary(conn) == [("d-phys", "2020", "W", 1, 1)]
+    assert conn.execute("SELECT * FROM catalogue_summary").fetchall() == [("2020", "W", 2)]
+
+
+def test_summaries_are_filled_from_existing_rows(db_path):
+    legacy_database(db_path, [lecture(1), lecture(2, access=False)], [course(1), course(2)])
+
+    conn = storage.connect(db_path)
+    assert summary(conn) == [("d-phys", "2020", "W", 1, 2)]
+    assert conn.execute("SELECT * FROM catalogue_summary").fetchall() == [("2020", "W", 2)]
+    conn.close()
+
+
+def test_writes_bump_the_table_version(conn):
+    def version():
+        return conn.execute("SELECT version FROM table_versions WHERE name = 'matches'").fetchone()[0]
+
+    match = {"url": lecture(1)["url"], "number": course(1)["number"], "year": "2020", "semester": "W", "score": 1.0}
+    storage.upsert(conn, "matches", storage.MATCH_COLUMNS, storage.MATCH_KEY, [match])
+    first = version()
+    # same count and score sum, different course
+    with conn:
+        conn.execute("DELETE FROM matches")
+    storage.upsert(conn, "matches", storage.MATCH_COLUMNS, storage.MATCH_KEY, [dict(match, number=course(2)["number"])])
+    assert version() > first
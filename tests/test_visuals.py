@@ -0,0 +1,35 @@
+"""
+Tests of the change-aware rendering of visuals.py.
+"""
+
+import json
+import os
+
+import pytest
+
+import main
+import storage
+import visuals
+from records import lecture
+
+
+def fail(year_data, out_dir):
+    raise ValueError("broken figure")
+
+
+def test_failing_figure_keeps_the_state_of_the_others(db_path, conn, tmp_path, monkeypatch):
+    storage.store_lectures([lecture(1)], db_path)
+    monkeypatch.chdir(tmp_path)  # the cube cache lives in the working directory
+    monkeypatch.setitem(visuals.FIGURES, "broken", (visuals.FIGURES["coverage"][0], fail))
+    out = str(tmp_path / "figures")
+
+    with pytest.raises(RuntimeError, match="broken"):
+        visuals.render_report(["portal", "broken"], db_path, out, workers=1)
+
+    with open(os.path.join(out, visuals.STATE_FILE)) as f:
+        assert set(json.load(f)) == {"portal"}
+    assert visuals.render_report(["portal"], db_path, out, workers=1) == []
+
+
+def test_command_line_offers_every_figure():
+    assert main.FIGURES == list(visuals.FIGURES)
@@ -0,0 +1,180 @@
+"""
+This module provides the HTTP transports used by the scraper.
+A transport owns a connection pool with an explicit size per host, keeps connections alive, requests compressed
+responses, applies timeouts and can be shared by any number of worker threads. `RequestsTransport` is built on
+requests/urllib3, `HttpxTransport` on httpx with optional HTTP/2.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401 (required by httpx for HTTP/2)
+except ImportError:
+    h2 = None
+
+# Headers to mimic a legitimate browser request, sent with every request
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.71 Safari/537.36",
+    "Referer": "https://example.com/",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5.0, 30.0)
+
+
+class RequestsTransport:
+    """
+    Thread-safe transport on top of requests.
+
+    Every thread gets its own `requests.Session` (sessions are not safe to share between threads), while all sessions
+    share one adapter, i.e. one thread-safe urllib3 pool with up to `pool_size` kept-alive connections per host.
+    The sessions are tracked and closed together with the pool by `close`.
+
+    Args:
+        pool_size (int): Maximum number of connections kept alive per host.
+        hosts (int): Number of host pools to keep.
+        timeout (tuple): (connect, read) timeouts in seconds.
+        headers (dict, optional): Headers sent with every request, defaults to `DEFAULT_HEADERS`.
+    """
+
+    def __init__(self, pool_size=32, hosts=4, timeout=DEFAULT_TIMEOUT, headers=None):
+        self.timeout = timeout
+        self.headers = dict(headers or DEFAULT_HEADERS)
+        self.adapter = HTTPAdapter(pool_connections=hosts, pool_maxsize=pool_size)
+        self.mounts = {"https://": self.adapter, "http://": self.adapter}
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def mount(self, prefix, adapter):
+        """Routes URLs starting with `prefix` through another adapter, in all threads."""
+        self.mounts[prefix] = adapter
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        """The session of the calling thread."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            for prefix, adapter in self.mounts.items():
+                session.mount(prefix, adapter)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def get(self, url, headers=None):
+        """
+        Sends a GET request.
+
+        Args:
+            url (str): The URL to request.
+            headers (dict, optional): Additional headers, e.g. for conditional requests.
+
+        Returns:
+            requests.Response: The response.
+
+        Raises:
+            requests.RequestException: If no response was received.
+        """
+        return self.session.get(url, headers=headers, timeout=self.timeout)
+
+    def close(self):
+        """Closes the sessions of all threads and the connection pools; the transport can be used again after."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+            self._local = threading.local()
+        for session in sessions:
+            session.close()
+        for adapter in set(self.mounts.values()):
+            adapter.close()
+
+
+class HttpxTransport:
+    """
+    Thread-safe transport on top of a single `httpx.Client`, with HTTP/2 when the h2 package is installed.
+
+    Responses and errors are converted to their requests equivalents, so callers handle both transports alike.
+
+    Args:
+        pool_size (int): Maximum number of connections kept alive (per host with HTTP/1.1).
+        timeout (tuple): (connect, read) timeouts in seconds.
+        headers (dict, optional): Headers sent with every request, defaults to `DEFAULT_HEADERS`.
+        http2 (bool, optional): Whether to negotiate HTTP/2, defaults to whether h2 is installed.
+    """
+
+    def __init__(self, pool_size=32, timeout=DEFAULT_TIMEOUT, headers=None, http2=None):
+        if httpx is None:
+            raise ImportError("HttpxTransport requires the httpx package")
+        connect, read = timeout
+        self.client = httpx.Client(
+            http2=h2 is not None if http2 is None else http2,
+            headers=dict(headers or DEFAULT_HEADERS),
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=pool_size),
+        )
+
+    def get(self, url, headers=None):
+        """
+        Sends a GET request.
+
+        Args:
+            url (str): The URL to request.
+            headers (dict, optional): Additional headers, e.g. for conditional requests.
+
+        Returns:
+            requests.Response: The response.
+
+        Raises:
+            requests.RequestException: If no response was received.
+        """
+        try:
+            result = self.client.get(url, headers=headers)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+        response = requests.Response()
+        response.status_code = result.status_code
+        response._content = result.content
+        response.headers = CaseInsensitiveDict(result.headers)
+        response.url = str(result.url)
+        response.reason = result.reason_phrase
+        return response
+
+    def close(self):
+        """Closes the client and its connections."""
+        self.client.close()
+
+
+TRANSPORTS = {"requests": RequestsTransport, "httpx": HttpxTransport}
+
+
+def make_transport(kind="requests", **options):
+    """
+    Creates a transport.
+
+    Args:
+        kind (str): 'requests' or 'httpx'.
+        **options: Keyword arguments of the transport class.
+
+    Returns:
+        The transport.
+    """
+    if kind not in TRANSPORTS:
+        raise ValueError(f"Unknown transport '{kind}', choose from {list(TRANSPORTS)}")
+    return TRANSPORTS[kind](**options)
@@ -1,68 +1,32 @@
-import numpy as np
-from matplotlib.gridspec import GridSpec
-from brokenaxes import brokenaxes
-import sqlite3
-import pandas as pd
+"""
+This module renders the figures of the report from the lecture database.
+Each figure is rendered by the headless Agg backend in its own process, and figures whose input data has not changed
+since their last render are skipped.
+
+Usage:
+    python visuals.py [--figures portal catalogue] [--db lecture_data.db] [--out figures] [--workers 2] [--force]
+"""
+
+import os
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use("Agg")  # noqa: E402
+
+from analytics import load_cube, view
 import matplotlib.pyplot as plt
 
-# establish connection to SQL database
-db_path = "lecture_data.db"
-conn = sqlite3.connect(db_path)
-
-# query to obtain accessible vs recorded lectures by department
-portal_department_qry = '''
-    SELECT department,
-            SUM(CASE WHEN access = 1 THEN 1 ELSE 0 END) AS accessible_count,
-            COUNT(*) AS total_count
-    FROM lectures WHERE year < 2024
-    GROUP BY department
-'''
-
-# query to obtain accessible vs recorded lecture by year
-portal_year_qry = '''
-    SELECT year,
-            SUM(CASE WHEN access = 1 THEN 1 ELSE 0 END) AS accessible_count,
-            COUNT(*) AS total_count
-    FROM lectures WHERE year < 2024
-    GROUP BY year
-    ORDER BY year
-'''
-
-# qry to obtain total number of lectures registered in ETH course catalogue by year
-catalogue_qry = '''
-    SELECT year, COUNT(*) AS total_count
-    FROM catalogue WHERE year < 2024
-    GROUP BY year
-    ORDER BY year
-'''
-
-# execute queries and convert to DataFrames
-portal_department_data = pd.read_sql(portal_department_qry, conn)
-portal_year_data = pd.read_sql(portal_year_qry, conn)
-catalogue_data = pd.read_sql(catalogue_qry, conn)
-
-
-# Compute fraction of accessible recordings by department
-portal_department_data['accessible_fraction'] = portal_department_data['accessible_count'] / \
-    portal_department_data['total_count']
-
-portal_department_data = portal_department_data.sort_values(
-    # department data according to descending accessibility
-    by='accessible_fraction', ascending=False
-)
-
-# enforce upper case on department names
-portal_department_data['department'] = portal_department_data['department'].str.upper()
-
-# Compute fraction of accessible recordings by year
-portal_year_data['accessible_fraction'] = portal_year_data['accessible_count'] / \
-    portal_year_data['total_count']
-
-# caculate fraction of series uploaded, public
-catalogue_data['uploaded_fraction'] = portal_year_data['total_count'] / \
-    catalogue_data['total_count']
-catalogue_data['accessible_fraction'] = portal_year_data['accessible_count'] / \
-    catalogue_data['total_count']
+DB_PATH = "lecture_data.db"
+FIGURES_DIR = "figures"
+
+# hashes of the data each figure was last rendered from
+STATE_FILE = ".render_state.json"
+
+# the report covers the years before this one
+UNTIL = 2024
 
 ## Create plots of data ##
 # standardize colors for consistency
@@ -72,150 +36,297 @@ colors = {
     'accessible': 'skyblue'
 }
 
-# Figure 1: illustrate data collected from video.ethz.ch #
-# Create figure and axes
-fig, axes = plt.subplots(2, 2, figsize=(10, 10))
-
-# Plot A: Department vs. Fraction of Accessible Lecture Series
-axes[0, 0].bar(portal_department_data['department'],
-               portal_department_data['accessible_fraction'],
-               color="mediumpurple",
-               edgecolor="black",
-               label="Accessible")
-
-axes[0, 0].set_xlabel('Department')
-axes[0, 0].set_ylabel('Fraction of Accessible Lecture Series')
-axes[0, 0].tick_params(axis='x', rotation=45)
-axes[0, 0].grid(True, which='both', linestyle='--',
-                linewidth=0.5, alpha=0.5, zorder=0)
-axes[0, 0].text(-0.1, 1.1, 'A', transform=axes[0, 0].transAxes,
-                fontsize=16, fontweight='bold', va='top', ha='right')
-
-# Plot B: Department vs Total number of lectures uploaded
-axes[0, 1].bar(portal_department_data["department"],
-               portal_department_data["total_count"],
-               color=colors['portal'],
-               edgecolor="black",
-               label="restricted")
-
-axes[0, 1].bar(portal_department_data['department'],
-               portal_department_data['accessible_count'],
-               color=colors['accessible'],
-               edgecolor='black',
-               label="accessible")
-
-axes[0, 1].set_xlabel('Department')
-axes[0, 1].set_ylabel('Total Number of Lecture Series')
-axes[0, 1].tick_params(axis='x', rotation=45)
-axes[0, 1].grid(True, which='both', linestyle='--',
-                linewidth=0.5, alpha=0.5, zorder=0)
-axes[0, 1].text(-0.1, 1.1, 'B', transform=axes[0, 1].transAxes,
-                fontsize=16, fontweight='bold', va='top', ha='right')
-axes[0, 1].legend(loc='upper left', frameon=False)
-
-# Plot C: year vs accessible fraction
-axes[1, 0].bar(portal_year_data['year'],
-               portal_year_data['accessible_fraction'],
-               color='mediumpurple',
-               edgecolor='black',
-               label='Accessible')
-
-axes[1, 0].set_xlabel('Year')
-axes[1, 0].set_ylabel('Fraction of Accessible Lecture Series')
-axes[1, 0].tick_params(axis='x', rotation=45)
-axes[1, 0].grid(True, which='both', linestyle='--',
-                linewidth=0.5, alpha=0.5, zorder=0)
-axes[1, 0].text(-0.1, 1.1, 'C', transform=axes[1, 0].transAxes,
-                fontsize=16, fontweight='bold', va='top', ha='right')
-
-# Plot D: Year vs lectures uploaded
-axes[1, 1].bar(portal_year_data['year'],
-               portal_year_data['total_count'],
-               color=colors['portal'],
-               edgecolor='black',
-               label="restricted")
-
-axes[1, 1].bar(portal_year_data['year'],
-               portal_year_data['accessible_count'],
-               color=colors['accessible'],
-               edgecolor='black',
-               label="accessible")
-
-axes[1, 1].set_xlabel('Year')
-axes[1, 1].set_ylabel('Number of Lecture Series Uploaded')
-axes[1, 1].tick_params(axis='x', rotation=45)
-axes[1, 1].grid(True, which='both', linestyle='--',
-                linewidth=0.5, alpha=0.5, zorder=0)
-axes[1, 1].text(-0.1, 1.1, 'D', transform=axes[1, 1].transAxes,
-                fontsize=16, fontweight='bold', va='top', ha='right')
-axes[1, 1].legend(loc='upper left', frameon=False)
-
-plt.tight_layout()
-plt.savefig("figures/portal.pdf")
-plt.savefig("figures/portal.jpeg")
-
-
-# Figure 2: compare portal data to course catalogue (=reference for total lecture output) #
-# create the plot layout
-
-fig, axes = plt.subplots(1, 2, figsize=(12, 5))
-fig.subplots_adjust(right=0.80, bottom=0.15)
-
-axes[0].grid(True, which='both', linestyle='--',
-             linewidth=0.5, alpha=0.5, zorder=0)
-axes[0].tick_params(axis='x', rotation=45)
-axes[0].set_xlabel("Year")
-axes[0].set_ylabel("Total Number of Lecture Series at ETH")
-
-axes[0].bar(catalogue_data['year'],
-            catalogue_data['total_count'],
-            color=colors['catalogue'],
-            edgecolor='black',
-            label='Course Catalogue')
-
-axes[0].bar(portal_year_data['year'],
-            portal_year_data['total_count'],
-            color=colors['portal'],
-            edgecolor='black',
-            label='Video Portal (Total)')
-
-axes[0].bar(portal_year_data['year'],
-            portal_year_data['accessible_count'],
-            color=colors['accessible'],
-            edgecolor='black',
-            label='Video Portal (Accessible)')
-axes[0].text(-0.1, 1.1, 'A', transform=axes[0].transAxes,
-             fontsize=16, fontweight='bold', va='top', ha='right')
-
-# axes[0].legend(loc='upper left', frameon=False)
-
-# Plot B: Fraction of lectures recorded and publicly uploaded
-axes[1].grid(True, which='both', linestyle='--',
-             linewidth=0.5, alpha=0.5, zorder=0)
-axes[1].set_xlabel("Year")
-axes[1].set_ylabel(
-    "Fraction of Respective Lecture Type")
-axes[1].tick_params(axis='x', rotation=45)
-
-axes[1].bar(catalogue_data['year'],
-            catalogue_data['uploaded_fraction'],
-            color=colors['portal'],
-            edgecolor='black',
-            label='Fraction uploaded')
-axes[1].bar(catalogue_data['year'],
-            catalogue_data['accessible_fraction'],
-            color=colors['accessible'],
-            edgecolor='black',
-            label="Fraction accessible")
-# axes[1].legend(loc='upper left', frameon=False)
-axes[1].text(-0.1, 1.1, 'B', transform=axes[1].transAxes,
-             fontsize=16, fontweight='bold', va='top', ha='right')
-
-# Create a common legend for both subplots
-handles, labels = axes[0].get_legend_handles_labels()
-fig.legend(handles, labels, loc='upper right',
-           bbox_to_anchor=(1.0, 0.9), frameon=False, ncol=1)
-
-plt.savefig("figures/catalogue.pdf")
-plt.savefig("figures/catalogue.jpeg")
-plt.show()
+
+def prepare_portal(portal_department_data):
+    """Orders the departments of the portal figure by their accessible fraction."""
+    portal_department_data = portal_department_data.sort_values(
+        # department data according to descending accessibility
+        by='accessible_fraction', ascending=False
+    )
+
+    # enforce upper case on department names
+    portal_department_data['department'] = portal_department_data['department'].str.upper()
+
+    return portal_department_data
+
+
+def plot_portal(portal_department_data, portal_year_data, out_dir=FIGURES_DIR):
+    """Renders the figure illustrating the data collected from video.ethz.ch."""
+    portal_department_data = prepare_portal(portal_department_data)
+
+    # Figure 1: illustrate data collected from video.ethz.ch #
+    # Create figure and axes
+    fig, axes = plt.subplots(2, 2, figsize=(10, 10))
+
+    # Plot A: Department vs. Fraction of Accessible Lecture Series
+    axes[0, 0].bar(portal_department_data['department'],
+                   portal_department_data['accessible_fraction'],
+                   color="mediumpurple",
+                   edgecolor="black",
+                   label="Accessible")
+
+    axes[0, 0].set_xlabel('Department')
+    axes[0, 0].set_ylabel('Fraction of Accessible Lecture Series')
+    axes[0, 0].tick_params(axis='x', rotation=45)
+    axes[0, 0].grid(True, which='both', linestyle='--',
+                    linewidth=0.5, alpha=0.5, zorder=0)
+    axes[0, 0].text(-0.1, 1.1, 'A', transform=axes[0, 0].transAxes,
+                    fontsize=16, fontweight='bold', va='top', ha='right')
+
+    # Plot B: Department vs Total number of lectures uploaded
+    axes[0, 1].bar(portal_department_data["department"],
+                   portal_department_data["total_count"],
+                   color=colors['portal'],
+                   edgecolor="black",
+                   label="restricted")
+
+    axes[0, 1].bar(portal_department_data['department'],
+                   portal_department_data['accessible_count'],
+                   color=colors['accessible'],
+                   edgecolor='black',
+                   label="accessible")
+
+    axes[0, 1].set_xlabel('Department')
+    axes[0, 1].set_ylabel('Total Number of Lecture Series')
+    axes[0, 1].tick_params(axis='x', rotation=45)
+    axes[0, 1].grid(True, which='both', linestyle='--',
+                    linewidth=0.5, alpha=0.5, zorder=0)
+    axes[0, 1].text(-0.1, 1.1, 'B', transform=axes[0, 1].transAxes,
+                    fontsize=16, fontweight='bold', va='top', ha='right')
+    axes[0, 1].legend(loc='upper left', frameon=False)
+
+    # Plot C: year vs accessible fraction
+    axes[1, 0].bar(portal_year_data['year'],
+                   portal_year_data['accessible_fraction'],
+                   color='mediumpurple',
+                   edgecolor='black',
+                   label='Accessible')
+
+    axes[1, 0].set_xlabel('Year')
+    axes[1, 0].set_ylabel('Fraction of Accessible Lecture Series')
+    axes[1, 0].tick_params(axis='x', rotation=45)
+    axes[1, 0].grid(True, which='both', linestyle='--',
+                    linewidth=0.5, alpha=0.5, zorder=0)
+    axes[1, 0].text(-0.1, 1.1, 'C', transform=axes[1, 0].transAxes,
+                    fontsize=16, fontweight='bold', va='top', ha='right')
+
+    # Plot D: Year vs lectures uploaded
+    axes[1, 1].bar(portal_year_data['year'],
+                   portal_year_data['total_count'],
+                   color=colors['portal'],
+                   edgecolor='black',
+                   label="restricted")
+
+    axes[1, 1].bar(portal_year_data['year'],
+                   portal_year_data['accessible_count'],
+                   color=colors['accessible'],
+                   edgecolor='black',
+                   label="accessible")
+
+    axes[1, 1].set_xlabel('Year')
+    axes[1, 1].set_ylabel('Number of Lecture Series Uploaded')
+    axes[1, 1].tick_params(axis='x', rotation=45)
+    axes[1, 1].grid(True, which='both', linestyle='--',
+                    linewidth=0.5, alpha=0.5, zorder=0)
+    axes[1, 1].text(-0.1, 1.1, 'D', transform=axes[1, 1].transAxes,
+                    fontsize=16, fontweight='bold', va='top', ha='right')
+    axes[1, 1].legend(loc='upper left', frameon=False)
+
+    plt.tight_layout()
+    plt.savefig(os.path.join(out_dir, "portal.pdf"))
+    plt.savefig(os.path.join(out_dir, "portal.jpeg"))
+    plt.close(fig)
+
+
+def plot_catalogue(year_data, out_dir=FIGURES_DIR):
+    """Renders the figure comparing the portal data to the course catalogue."""
+    # Figure 2: compare portal data to course catalogue (=reference for total lecture output) #
+    # create the plot layout
+
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    fig.subplots_adjust(right=0.80, bottom=0.15)
+
+    axes[0].grid(True, which='both', linestyle='--',
+                 linewidth=0.5, alpha=0.5, zorder=0)
+    axes[0].tick_params(axis='x', rotation=45)
+    axes[0].set_xlabel("Year")
+    axes[0].set_ylabel("Total Number of Lecture Series at ETH")
+
+    axes[0].bar(year_data['year'],
+                year_data['catalogue_count'],
+                color=colors['catalogue'],
+                edgecolor='black',
+                label='Course Catalogue')
+
+    axes[0].bar(year_data['year'],
+                year_data['total_count'],
+                color=colors['portal'],
+                edgecolor='black',
+                label='Video Portal (Total)')
+
+    axes[0].bar(year_data['year'],
+                year_data['accessible_count'],
+                color=colors['accessible'],
+                edgecolor='black',
+                label='Video Portal (Accessible)')
+    axes[0].text(-0.1, 1.1, 'A', transform=axes[0].transAxes,
+                 fontsize=16, fontweight='bold', va='top', ha='right')
+
+    # axes[0].legend(loc='upper left', frameon=False)
+
+    # Plot B: Fraction of lectures recorded and publicly uploaded
+    axes[1].grid(True, which='both', linestyle='--',
+                 linewidth=0.5, alpha=0.5, zorder=0)
+    axes[1].set_xlabel("Year")
+    axes[1].set_ylabel(
+        "Fraction of Respective Lecture Type")
+    axes[1].tick_params(axis='x', rotation=45)
+
+    axes[1].bar(year_data['year'],
+                year_data['uploaded_fraction'],
+                color=colors['portal'],
+                edgecolor='black',
+                label='Fraction uploaded')
+    axes[1].bar(year_data['year'],
+                year_data['public_fraction'],
+                color=colors['accessible'],
+                edgecolor='black',
+                label="Fraction accessible")
+    # axes[1].legend(loc='upper left', frameon=False)
+    axes[1].text(-0.1, 1.1, 'B', transform=axes[1].transAxes,
+                 fontsize=16, fontweight='bold', va='top', ha='right')
+
+    # Create a common legend for both subplots
+    handles, labels = axes[0].get_legend_handles_labels()
+    fig.legend(handles, labels, loc='upper right',
+               bbox_to_anchor=(1.0, 0.9), frameon=False, ncol=1)
+
+    plt.savefig(os.path.join(out_dir, "catalogue.pdf"))
+    plt.savefig(os.path.join(out_dir, "catalogue.jpeg"))
+    plt.close(fig)
+
+
+def plot_coverage(year_data, out_dir=FIGURES_DIR):
+    """Renders the figure showing the fraction of catalogue courses matched to a recording (see matching.py)."""
+    fig, ax = plt.subplots(figsize=(6, 5))
+    ax.grid(True, which='both', linestyle='--',
+            linewidth=0.5, alpha=0.5, zorder=0)
+    ax.bar(year_data['year'],
+           year_data['recorded_fraction'],
+           color=colors['portal'],
+           edgecolor='black',
+           label='Recorded')
+    ax.bar(year_data['year'],
+           year_data['accessible_course_fraction'],
+           color=colors['accessible'],
+           edgecolor='black',
+           label='Accessible')
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Fraction of Catalogue Courses")
+    ax.tick_params(axis='x', rotation=45)
+    ax.legend(loc='lower left', bbox_to_anchor=(0, 1.0), ncol=2, frameon=False)
+
+    plt.tight_layout()
+    plt.savefig(os.path.join(out_dir, "coverage.pdf"))
+    plt.savefig(os.path.join(out_dir, "coverage.jpeg"))
+    plt.close(fig)
+
+
+# figure name -> (function selecting its input data from the analytics cube, function rendering it)
+FIGURES = {
+    "portal": (lambda cube: [view(cube, ["department"], UNTIL),
+                             view(cube, ["year"], UNTIL).query("total_count > 0")], plot_portal),
+    "catalogue": (lambda cube: [view(cube, ["year"], UNTIL)], plot_catalogue),
+    "coverage": (lambda cube: [view(cube, ["year"], UNTIL)], plot_coverage),
+}
+
+
+def data_hash(frames):
+    """Hashes the data a figure is rendered from."""
+    digest = hashlib.sha256()
+    for frame in frames:
+        digest.update(frame.to_json(orient="split").encode())
+    return digest.hexdigest()
+
+
+def _render(name, frames, out_dir):
+    FIGURES[name][1](*frames, out_dir=out_dir)
+    return name
+
+
+def render_report(figures=None, db_path=DB_PATH, out_dir=FIGURES_DIR, workers=None, force=False):
+    """
+    Renders the selected figures, skipping those whose input data is unchanged since their last render.
+
+    Args:
+        figures (list, optional): Names of the figures to render (see `FIGURES`), defaults to all.
+        db_path (str): Path to the SQLite database.
+        out_dir (str): Directory the figures are written to.
+        workers (int, optional): Number of processes rendering figures in parallel.
+        force (bool): Whether to render figures even if their data is unchanged.
+
+    Returns:
+        list: The names of the figures that were rendered.
+
+    Raises:
+        RuntimeError: If a figure failed to render, after the others were rendered and recorded.
+    """
+    figures = figures or list(FIGURES)
+    unknown = set(figures) - set(FIGURES)
+    if unknown:
+        raise ValueError(f"Unknown figures {sorted(unknown)}, choose from {list(FIGURES)}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    state_path = os.path.join(out_dir, STATE_FILE)
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+
+    cube = load_cube(db_path)
+    jobs = {}
+    for name in figures:
+        frames = FIGURES[name][0](cube)
+        digest = data_hash(frames)
+        if force or state.get(name) != digest:
+            jobs[name] = (frames, digest)
+        else:
+            print(f"Skipping {name}, data unchanged since last render")
+
+    # the hash of every figure is recorded as it completes, so a failing figure does not re-render the others
+    failed = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_render, name, frames, out_dir): name for name, (frames, _) in jobs.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error rendering {name}: {e}")
+                    failed.append(name)
+                    continue
+                state[name] = jobs[name][1]
+                print(f"Rendered {name}")
+    finally:
+        with open(state_path, "w") as f:
+            json.dump(state, f, indent=2)
+    if failed:
+        raise RuntimeError(f"Rendering failed for {sorted(failed)}")
+    return list(jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the report figures from the lecture database.")
+    parser.add_argument("--figures", nargs="+", choices=list(FIGURES), help="figures to render (default: all)")
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    parser.add_argument("--out", default=FIGURES_DIR, help="output directory")
+    parser.add_argument("--workers", type=int, help="number of rendering processes")
+    parser.add_argument("--force", action="store_true", help="render even if the data is unchanged")
+    args = parser.parse_args()
+
+    render_report(args.figures, args.db, args.out, args.workers, args.force)
+
+
+if __name__ == "__main__":
+    main()